@@ -0,0 +1,44 @@
+import numba
+import numpy as np
+
+
+# cache=True keeps the compiled kernel in __pycache__, so later processes skip compilation
+@numba.njit(cache=True)
+def euler_kernel(body, a_angular, mass, dt, state):
+    """
+    Compiled version of the stepped Euler loop of simulate_auv2_motion, filling rows 1 onward of a state block whose first row holds the initial state
+
+    body: np.ndarray of shape (steps, 2) holding the thrust resolved onto the x and y axes of the AUV at each step in N
+    a_angular: np.ndarray of shape (steps,) holding the angular acceleration at each step in rad/s^2
+    mass: mass of the AUV in kg
+    dt: time step of the simulation in s
+    state: np.ndarray of shape (steps, 8) with columns x, y, theta, vx, vy, omega, ax, ay
+    """
+
+    x, y, theta, vx, vy, omega = (
+        state[0, 0],
+        state[0, 1],
+        state[0, 2],
+        state[0, 3],
+        state[0, 4],
+        state[0, 5],
+    )
+    for i in range(1, state.shape[0]):
+        cos_theta = np.cos(theta)
+        sin_theta = np.sin(theta)
+        ax = (cos_theta * body[i, 0] + -sin_theta * body[i, 1]) / mass
+        ay = (sin_theta * body[i, 0] + cos_theta * body[i, 1]) / mass
+        omega = omega + a_angular[i] * dt
+        vx = vx + ax * dt
+        vy = vy + ay * dt
+        x = x + vx * dt
+        y = y + vy * dt
+        theta = theta + omega * dt
+        state[i, 0] = x
+        state[i, 1] = y
+        state[i, 2] = theta
+        state[i, 3] = vx
+        state[i, 4] = vy
+        state[i, 5] = omega
+        state[i, 6] = ax
+        state[i, 7] = ay
@@ -0,0 +1,275 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from functools import partial
+
+import numpy as np
+
+import physics
+
+_T = np.array([40.0, 60.0, 80.0, 100.0])
+_SAMPLES = 100_000
+# Modules whose cold import time is benchmarked
+_IMPORTED_MODULES = ("physics", "sweep", "trajectory_store")
+
+
+def _simulation_cases(quick):
+    horizons = (10.0, 100.0) if quick else (10.0, 100.0, 1000.0)
+    dts = (0.1, 0.01) if quick else (0.1, 0.01, 0.001)
+    for t_final in horizons:
+        for dt in dts:
+            steps = int(np.ceil(t_final / dt))
+            if steps > 1_000_000:
+                continue
+            for vectorized in (False, True):
+                # The stepped loop is only timed on horizons it finishes in a few seconds
+                if not vectorized and steps > 100_000:
+                    continue
+                mode = "vectorized" if vectorized else "stepped"
+                yield (
+                    f"simulate_auv2_motion[{mode},t_final={t_final:g},dt={dt:g}]",
+                    partial(
+                        physics.simulate_auv2_motion,
+                        _T,
+                        np.pi / 3,
+                        3.0,
+                        2.0,
+                        dt=dt,
+                        t_final=t_final,
+                        vectorized=vectorized,
+                    ),
+                    steps,
+                )
+
+
+def _dynamics_cases():
+    geometry = physics.get_thruster_geometry(np.pi / 3, 3.0, 2.0)
+    calls = 10_000
+
+    def repeat(function, *args):
+        def run():
+            for _ in range(calls):
+                function(*args)
+
+        return run
+
+    yield (
+        "calculate_auv2_acceleration",
+        repeat(physics.calculate_auv2_acceleration, _T, np.pi / 3, 0.5),
+        calls,
+    )
+    yield (
+        "calculate_auv2_acceleration[geometry]",
+        repeat(physics.calculate_auv2_acceleration, _T, np.pi / 3, 0.5, 100, geometry),
+        calls,
+    )
+    yield (
+        "simulate_auv2_motion[default backend,steps=1]",
+        repeat(
+            physics.simulate_auv2_motion, _T, np.pi / 3, 3.0, 2.0, 100, 100, 0.1, 0.1
+        ),
+        calls,
+    )
+    yield (
+        "AUV2Stepper.step",
+        repeat(physics.AUV2Stepper(np.pi / 3, 3.0, 2.0).step, _T, 0.01),
+        calls,
+    )
+    yield (
+        "calculate_auv2_angular_acceleration",
+        repeat(physics.calculate_auv2_angular_acceleration, _T, np.pi / 3, 3.0, 2.0),
+        calls,
+    )
+
+
+def _basic_cases():
+    rng = np.random.default_rng(0)
+    depth = rng.uniform(-100, 100, _SAMPLES)
+    volume = rng.uniform(0.1, 1, _SAMPLES)
+    mass = rng.uniform(10, 1000, _SAMPLES)
+    for name, scalar, array, args in [
+        (
+            "calculate_buoyancy",
+            physics.calculate_buoyancy,
+            physics.calculate_buoyancy_array,
+            (1000.0, volume),
+        ),
+        (
+            "will_it_float",
+            physics.will_it_float,
+            physics.will_it_float_array,
+            (volume, mass),
+        ),
+        (
+            "calculate_pressure",
+            physics.calculate_pressure,
+            physics.calculate_pressure_array,
+            (depth,),
+        ),
+        (
+            "calculate_acceleration",
+            physics.calculate_acceleration,
+            physics.calculate_acceleration_array,
+            (depth, mass),
+        ),
+    ]:
+        columns = [
+            arg.tolist() if isinstance(arg, np.ndarray) else [arg] * _SAMPLES
+            for arg in args
+        ]
+        yield (
+            f"{name}[scalar]",
+            lambda scalar=scalar, columns=columns: [
+                scalar(*row) for row in zip(*columns)
+            ],
+            _SAMPLES,
+        )
+        yield (f"{name}[array]", lambda array=array, args=args: array(*args), _SAMPLES)
+
+
+def run_benchmark(function, steps, repeat=3):
+    """
+    Times function, returning the best wall time of repeat runs in s, the throughput in steps/s, and the peak memory traced during one extra run in bytes
+
+    function: callable taking no arguments
+    steps: number of simulation steps, calls, or samples one run of function processes
+    repeat(optional): number of timed runs
+    """
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "seconds": best,
+        "steps_per_second": steps / best if best > 0 else float("inf"),
+        "peak_memory_bytes": peak,
+    }
+
+
+def run_import_benchmark(module, repeat=3):
+    """
+    Times the import of module in fresh interpreters with -X importtime, returning the best cumulative import time of repeat runs in s, the imports/s it allows, the peak memory traced during one extra import in bytes, and whether the import loaded NumPy
+
+    module: name of the module to import
+    repeat(optional): number of timed imports
+    """
+
+    def run(*options, code=""):
+        return subprocess.run(
+            [sys.executable, *options, "-c", f"import {module}, sys{code}"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+
+    best = float("inf")
+    for _ in range(repeat):
+        # Lines read "import time: self [us] | cumulative [us] | package"
+        for line in run("-X", "importtime").stderr.splitlines():
+            fields = line.split("|")
+            if len(fields) == 3 and fields[2].strip() == module:
+                best = min(best, int(fields[1]) / 1e6)
+
+    traced = run(
+        "-X",
+        "tracemalloc",
+        code="; import tracemalloc; print(tracemalloc.get_traced_memory()[1], 'numpy' in sys.modules)",
+    )
+    peak, numpy_loaded = traced.stdout.split()
+    return {
+        "seconds": best,
+        "steps_per_second": 1 / best if best > 0 else float("inf"),
+        "peak_memory_bytes": int(peak),
+        "numpy_loaded": numpy_loaded == "True",
+    }
+
+
+def run_benchmarks(quick=False, repeat=3):
+    """
+    Runs every benchmark of the physics and simulation hot paths and the import time of the physics modules, returning a dict of results keyed by benchmark name
+
+    quick(optional): skip the longest horizons and finest time steps
+    repeat(optional): number of timed runs of each benchmark
+    """
+
+    cases = [*_simulation_cases(quick), *_dynamics_cases(), *_basic_cases()]
+    results = {
+        name: run_benchmark(function, steps, repeat) for name, function, steps in cases
+    }
+    for module in _IMPORTED_MODULES:
+        results[f"import {module}"] = run_import_benchmark(module, repeat)
+    return results
+
+
+def find_regressions(results, baseline, threshold=0.1):
+    """
+    Compares benchmark results against a baseline, returning a dict of the benchmarks whose throughput fell by more than threshold, mapped to the fractional slowdown
+
+    results: dict returned by run_benchmarks
+    baseline: dict returned by run_benchmarks on an earlier revision
+    threshold(optional): largest tolerated fractional drop in steps/s
+    """
+
+    if threshold < 0:
+        raise ValueError("The regression threshold cannot be a negative quantity")
+    regressions = {}
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        slowdown = 1 - result["steps_per_second"] / baseline[name]["steps_per_second"]
+        if slowdown > threshold:
+            regressions[name] = slowdown
+    return regressions
+
+
+def format_results(results, regressions=None):
+    regressions = regressions or {}
+    lines = [f"{'benchmark':<60} {'steps/s':>14} {'peak MiB':>10}"]
+    for name, result in results.items():
+        line = f"{name:<60} {result['steps_per_second']:>14.4g} {result['peak_memory_bytes'] / 2**20:>10.2f}"
+        if name in regressions:
+            line += f"  REGRESSION {regressions[name]:.0%} slower"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the physics and simulation hot paths"
+    )
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", help="write the results to this baseline JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.quick, args.repeat)
+    regressions = {}
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = find_regressions(results, json.load(file), args.threshold)
+    print(format_results(results, regressions))
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,116 @@
+import sys
+import time
+from contextlib import contextmanager
+
+# csv and json are imported by the exporters that use them, as physics imports this
+# module and should stay quick to import
+
+# Profiler the instrumented physics functions report to; None while profiling is off,
+# which keeps the cost of every instrumentation point to a single comparison
+active_profiler = None
+
+
+class PhaseProfiler:
+    """
+    Accumulates the wall time, number of calls, and net change in allocated memory blocks of each named phase of the instrumented physics functions
+    """
+
+    def __init__(self):
+        self.phases = {}
+
+    def start(self):
+        """
+        Returns a token marking the start of a phase
+        """
+
+        return (time.perf_counter(), sys.getallocatedblocks())
+
+    def stop(self, phase: str, token):
+        """
+        Records the phase started at token as finished now
+        """
+
+        now = time.perf_counter()
+        blocks = sys.getallocatedblocks()
+        record = self.phases.get(phase)
+        if record is None:
+            record = self.phases[phase] = [0, 0.0, 0]
+        record[0] += 1
+        record[1] += now - token[0]
+        record[2] += blocks - token[1]
+
+    def lap(self, phase: str, token):
+        """
+        Records the phase started at token as finished now and returns a token for the phase that follows it
+        """
+
+        self.stop(phase, token)
+        return self.start()
+
+    @contextmanager
+    def phase(self, phase: str):
+        token = self.start()
+        try:
+            yield
+        finally:
+            self.stop(phase, token)
+
+    def summary(self) -> dict:
+        """
+        Returns a dict mapping each phase to its number of calls, total wall time in s, and net allocated memory blocks
+        """
+
+        return {
+            phase: {"calls": calls, "seconds": seconds, "allocated_blocks": blocks}
+            for phase, (calls, seconds, blocks) in self.phases.items()
+        }
+
+    def to_json(self, path: str = None) -> str:
+        """
+        Returns the summary as JSON, also writing it to path when given
+        """
+
+        import json
+
+        text = json.dumps(self.summary(), indent=2)
+        if path is not None:
+            with open(path, "w") as file:
+                file.write(text)
+        return text
+
+    def to_csv(self, path: str):
+        """
+        Writes the summary to path as CSV with one row per phase
+        """
+
+        import csv
+
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["phase", "calls", "seconds", "allocated_blocks"])
+            for phase, record in self.summary().items():
+                writer.writerow(
+                    [
+                        phase,
+                        record["calls"],
+                        record["seconds"],
+                        record["allocated_blocks"],
+                    ]
+                )
+
+
+@contextmanager
+def profile_physics(profiler: PhaseProfiler = None):
+    """
+    Records the phases of every instrumented physics call made inside the with block, yielding the profiler they are recorded in; profiling is process wide, so calls from other threads are recorded too
+
+    profiler(optional): profiler to keep accumulating into, a new one is created when omitted
+    """
+
+    global active_profiler
+    previous = active_profiler
+    active_profiler = profiler if profiler is not None else PhaseProfiler()
+    try:
+        yield active_profiler
+    finally:
+        active_profiler = previous
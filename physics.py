@@ -1,5 +1,77 @@
-import numpy as np
-from operator import add
+import importlib
+import math
+import os
+import struct
+from functools import lru_cache
+from operator import itemgetter
+
+import instrumentation
+
+# Only the physics API is exported, so a star import does not pick up the NumPy stand-in
+# below or the modules used internally
+__all__ = [
+    "g",
+    "density_water",
+    "atmospheric_pressure",
+    "calculate_buoyancy",
+    "will_it_float",
+    "calculate_pressure",
+    "calculate_acceleration",
+    "calculate_angular_acceleration",
+    "calculate_torque",
+    "calculate_moment_of_inertia",
+    "InvalidInputError",
+    "calculate_buoyancy_array",
+    "will_it_float_array",
+    "calculate_pressure_array",
+    "calculate_acceleration_array",
+    "calculate_angular_acceleration_array",
+    "calculate_torque_array",
+    "calculate_moment_of_inertia_array",
+    "simulate_vertical_motion",
+    "calculate_auv_acceleration",
+    "calculate_auv_angular_acceleration",
+    "ThrusterGeometry",
+    "get_thruster_geometry",
+    "calculate_auv2_acceleration",
+    "calculate_auv2_angular_acceleration",
+    "ThrusterAllocation",
+    "get_thruster_allocation",
+    "allocate_auv2_thrusts",
+    "simulate_auv2_motion",
+    "AUV2_STATE_COLUMNS",
+    "auv2_state_channels",
+    "AUV2Checkpoint",
+    "AUV2Stepper",
+    "AUV2_OUTPUT_CHANNELS",
+    "expand_segment_schedule",
+    "waypoint_event",
+    "bounding_box_event",
+    "pressure_limit_event",
+    "simulate_auv2_motion_chunks",
+    "prepare_auv2_batch",
+    "step_auv2_batch",
+    "simulate_auv2_motion_batch",
+    "simulate_auv2_monte_carlo",
+]
+
+
+class _LazyModule:
+    """
+    Stand-in for a module that is only imported on first attribute access, after which the real module replaces it in the globals of this module; keeps NumPy out of the import of physics so the scalar helpers load quickly
+    """
+
+    def __init__(self, name: str, alias: str):
+        self._name = name
+        self._alias = alias
+
+    def __getattr__(self, attribute):
+        module = importlib.import_module(self._name)
+        globals()[self._alias] = module
+        return getattr(module, attribute)
+
+
+np = _LazyModule("numpy", "np")
 
 # Global constants
 g = 9.81  # m/s^2
@@ -80,6 +152,9 @@ def calculate_torque(F_magnitude, F_direction, r):
 
     if r <= 0:
         raise ValueError("Distance must be a positive quantity")
+    if isinstance(F_direction, (int, float)):
+        return r * F_magnitude * math.sin(math.radians(F_direction))  # N*m
+    # Array-like directions broadcast through NumPy as before
     return r * F_magnitude * np.sin(np.deg2rad(F_direction))  # N*m
 
 
@@ -95,7 +170,238 @@ def calculate_moment_of_inertia(m, r):
         raise ValueError(
             "Object must have a positive mass, and the distance from the axis of rotation to the center of mass of the object must be positive"
         )
-    return m * np.power(r, 2)  # kg*m^2
+    return m * r**2  # kg*m^2
+
+
+class InvalidInputError(ValueError):
+    """
+    Raised by the array physics functions when some elements of their inputs are invalid; the indices of every invalid element are kept in the indices attribute as an array with one row per element
+    """
+
+    def __init__(self, message: str, indices: "np.ndarray"):
+        self.indices = indices
+        super().__init__(
+            f"{message} ({len(indices)} invalid element(s) at indices {indices.tolist()[:10]}{'...' if len(indices) > 10 else ''})"
+        )
+
+
+def _check_array_inputs(invalid, message):
+    """
+    Raises an InvalidInputError listing every index at which the broadcast boolean mask invalid is set
+    """
+
+    if np.any(invalid):
+        raise InvalidInputError(message, np.argwhere(invalid))
+
+
+def calculate_buoyancy_array(density_fluid, v, out=None):
+    """
+    Calculates the buoyant force acting on each object, broadcasting over array inputs
+
+    density_fluid: density of the fluid in kg/m^3, scalar or array
+    v: volume of the objects in m^3, scalar or array
+    out(optional): array to write the result into
+    """
+
+    density_fluid = np.asarray(density_fluid, dtype=float)
+    v = np.asarray(v, dtype=float)
+    _check_array_inputs(
+        (density_fluid <= 0) | (v <= 0),
+        "Density and volume must be positive quantities",
+    )
+    if out is None:
+        out = np.empty(np.broadcast_shapes(density_fluid.shape, v.shape))
+    np.multiply(density_fluid, v, out=out)
+    return np.multiply(out, g, out=out)  # N
+
+
+def will_it_float_array(V, mass, out=None):
+    """
+    Determines if each object will float in water, broadcasting over array inputs
+
+    V: volume of the objects in m^3, scalar or array
+    mass: mass of the objects in kg, scalar or array
+    out(optional): boolean array to write the result into
+    """
+
+    V = np.asarray(V, dtype=float)
+    mass = np.asarray(mass, dtype=float)
+    _check_array_inputs(
+        (mass <= 0) | (V <= 0), "Mass and volume must be positive quantities"
+    )
+    return np.less(mass / V, density_water, out=out)
+
+
+def calculate_pressure_array(depth, out=None):
+    """
+    Determines the pressure at each depth, broadcasting over array inputs
+
+    depth: depth of the water in m, scalar or array (positive and negative inputs are valid)
+    out(optional): array to write the result into
+    """
+
+    depth = np.asarray(depth, dtype=float)
+    if out is None:
+        out = np.empty(depth.shape)
+    np.abs(depth, out=out)
+    np.multiply(density_water, out, out=out)
+    np.multiply(out, g, out=out)
+    return np.add(atmospheric_pressure, out, out=out)  # N / m^2
+
+
+def calculate_acceleration_array(F, m, out=None):
+    """
+    Calculates the linear acceleration of each object, broadcasting over array inputs
+
+    F: force applied in N, scalar or array
+    m: mass of the objects in kg, scalar or array
+    out(optional): array to write the result into
+    """
+
+    m = np.asarray(m, dtype=float)
+    _check_array_inputs(m <= 0, "The object must have a positive mass")
+    return np.divide(F, m, out=out)  # m/s^2
+
+
+def calculate_angular_acceleration_array(tau, I, out=None):
+    """
+    Calculates the angular acceleration of each object, broadcasting over array inputs
+
+    tau: torque applied in N*m, scalar or array
+    I: moment of inertia of the objects in kg*m^2, scalar or array
+    out(optional): array to write the result into
+    """
+
+    I = np.asarray(I, dtype=float)
+    _check_array_inputs(I <= 0, "The object must have a positive moment of inertia")
+    return np.divide(tau, I, out=out)
+
+
+def calculate_torque_array(F_magnitude, F_direction, r, out=None):
+    """
+    Calculates the torque on each object, broadcasting over array inputs
+
+    F_magnitude: magnitude of the force applied in N, scalar or array
+    F_direction: direction of the force applied in degrees relative to the axis of rotation, scalar or array
+    r: distance from the axis of rotation to where the force is applied in m, scalar or array
+    out(optional): array to write the result into
+    """
+
+    r = np.asarray(r, dtype=float)
+    _check_array_inputs(r <= 0, "Distance must be a positive quantity")
+    direction = np.sin(np.deg2rad(F_direction))
+    if out is None:
+        out = np.empty(
+            np.broadcast_shapes(r.shape, np.shape(F_magnitude), direction.shape)
+        )
+    np.multiply(r, F_magnitude, out=out)
+    return np.multiply(out, direction, out=out)  # N*m
+
+
+def calculate_moment_of_inertia_array(m, r, out=None):
+    """
+    Calculates the moment of inertia of each object, broadcasting over array inputs
+
+    m: mass of the objects in kg, scalar or array
+    r: distance from the axis of rotation to the center of mass of the objects in m, scalar or array
+    out(optional): array to write the result into
+    """
+
+    m = np.asarray(m, dtype=float)
+    r = np.asarray(r, dtype=float)
+    _check_array_inputs(
+        (m <= 0) | (r < 0),
+        "Object must have a positive mass, and the distance from the axis of rotation to the center of mass of the object must be positive",
+    )
+    if out is None:
+        out = np.empty(np.broadcast_shapes(m.shape, r.shape))
+    np.power(r, 2, out=out)
+    return np.multiply(m, out, out=out)  # kg*m^2
+
+
+def simulate_vertical_motion(
+    density_object,
+    volume,
+    dt=0.01,
+    t_final=10,
+    z0=0,
+    velocity0=0,
+    drag_coefficient=0,
+    area=None,
+    density_fluid=density_water,
+):
+    """
+    Simulates the vertical motion of objects released in a fluid under their weight, buoyancy, and quadratic drag, integrating every object at once; returns the time array followed by arrays of shape (..., steps) of the height, vertical velocity, vertical acceleration, and pressure of the objects, where ... is the broadcast shape of the inputs
+
+    Heights are positive upward, with the fluid filling all of space. Without drag the net force is constant and the trajectories are computed in closed form; otherwise the objects are advanced together with one vectorized step per time step. Both use explicit Euler steps, so they agree for a drag coefficient of zero
+
+    density_object: density of the objects in kg/m^3, scalar or array
+    volume: volume of the objects in m^3, scalar or array
+    dt(optional): time step of the simulation in s
+    t_final(optional): final time of the simulation in s
+    z0(optional): initial height of the objects in m, scalar or array
+    velocity0(optional): initial vertical velocity of the objects in m/s, scalar or array
+    drag_coefficient(optional): drag coefficient of the objects, scalar or array
+    area(optional): cross-sectional area of the objects in m^2, scalar or array; defaults to that of a sphere of the same volume
+    density_fluid(optional): density of the fluid in kg/m^3, scalar or array
+    """
+
+    density_object = np.asarray(density_object, dtype=float)
+    volume = np.asarray(volume, dtype=float)
+    drag_coefficient = np.asarray(drag_coefficient, dtype=float)
+    _check_array_inputs(
+        (density_object <= 0) | (drag_coefficient < 0),
+        "Densities must be positive quantities and drag coefficients cannot be negative quantities",
+    )
+    if dt < 0 or t_final < 0:
+        raise ValueError("Time cannot be a negative quantity")
+
+    buoyancy = calculate_buoyancy_array(density_fluid, volume)
+    mass = density_object * volume
+    net_acceleration = (buoyancy - mass * g) / mass
+    if area is None:
+        area = np.pi * (3 * volume / (4 * np.pi)) ** (2 / 3)
+    # Drag force per unit speed squared, divided by the mass of each object
+    drag = 0.5 * np.asarray(density_fluid, dtype=float) * drag_coefficient * area / mass
+
+    t = np.arange(0, t_final, dt)
+    shape = np.broadcast_shapes(
+        net_acceleration.shape, drag.shape, np.shape(z0), np.shape(velocity0)
+    ) + (len(t),)
+    z0 = np.asarray(z0, dtype=float)
+    velocity0 = np.asarray(velocity0, dtype=float)
+
+    if not np.any(drag):
+        # Closed form of the explicit Euler recursion under a constant force
+        i = np.arange(len(t))
+        velocity = velocity0[..., np.newaxis] + net_acceleration[..., np.newaxis] * (
+            i * dt
+        )
+        z = (
+            z0[..., np.newaxis]
+            + velocity0[..., np.newaxis] * (i * dt)
+            + net_acceleration[..., np.newaxis] * (dt**2 * i * (i - 1) / 2)
+        )
+        velocity = np.broadcast_to(velocity, shape).copy()
+        z = np.broadcast_to(z, shape).copy()
+        acceleration = np.broadcast_to(net_acceleration[..., np.newaxis], shape).copy()
+        return (t, z, velocity, acceleration, calculate_pressure_array(z))
+
+    z = np.zeros(shape)
+    velocity = np.zeros(shape)
+    acceleration = np.zeros(shape)
+    if len(t):
+        z[..., 0] = z0
+        velocity[..., 0] = velocity0
+    for i in range(len(t)):
+        acceleration[..., i] = net_acceleration - drag * velocity[..., i] * np.abs(
+            velocity[..., i]
+        )
+        if i + 1 < len(t):
+            velocity[..., i + 1] = velocity[..., i] + acceleration[..., i] * dt
+            z[..., i + 1] = z[..., i] + velocity[..., i] * dt
+
+    return (t, z, velocity, acceleration, calculate_pressure_array(z))
 
 
 def calculate_auv_acceleration(
@@ -149,8 +455,53 @@ def calculate_auv_angular_acceleration(
     )
 
 
+class ThrusterGeometry:
+    """
+    Precomputed thruster geometry of the AUV for a given thruster angle and thruster placement, shared by the AUV2 acceleration functions and simulator so the thruster trigonometry is only evaluated once
+
+    alpha: angle of the thrusters in rad
+    L: distance from the center of mass of the AUV to the thrusters on the major axis of the AUV in m
+    l: distance from the center of mass of the AUV to the thrusters on the minor axis of the AUV in m
+    """
+
+    def __init__(self, alpha: float, L: float, l: float):
+        self.alpha = alpha
+        self.L = L
+        self.l = l
+
+        # Maps the four thrusts onto the x and y axes of the AUV
+        self.allocation = np.array(
+            [
+                [np.cos(alpha), np.cos(alpha), -np.cos(alpha), -np.cos(alpha)],
+                [np.sin(alpha), -np.sin(alpha), -np.sin(alpha), np.sin(alpha)],
+            ]
+        )
+        self.allocation.flags.writeable = False
+
+        # Lever arm of each thruster about the center of mass
+        self.rotation = np.array([1, -1, 1, -1])
+        self.rotation.flags.writeable = False
+        self.sin_gamma = L * np.sin(alpha) + l * np.cos(alpha)
+
+    def matches(self, alpha: float, L: float, l: float) -> bool:
+        return (self.alpha, self.L, self.l) == (alpha, L, l)
+
+
+@lru_cache(maxsize=128)
+def get_thruster_geometry(alpha, L, l):
+    """
+    Returns the ThrusterGeometry for (alpha, L, l), reusing a previously built one when the same geometry was requested recently
+
+    alpha: angle of the thrusters in rad
+    L: distance from the center of mass of the AUV to the thrusters on the major axis of the AUV in m
+    l: distance from the center of mass of the AUV to the thrusters on the minor axis of the AUV in m
+    """
+
+    return ThrusterGeometry(alpha, L, l)
+
+
 # More testing necessary
-def calculate_auv2_acceleration(T, alpha, theta, mass=100):
+def calculate_auv2_acceleration(T, alpha, theta, mass=100, geometry=None):
     """
     Calculates the acceleration of the AUV in the 2-D plane given the forces applied by each of the four thrusters, the angle at which the thrusters are rotated, the angle at which the AUV is rotated, and the mass of the AUV
 
@@ -158,27 +509,43 @@ def calculate_auv2_acceleration(T, alpha, theta, mass=100):
     alpha: angle of the thruster in rad
     theta: angle at which the AUV is rotated in rad relative to the global context
     mass(optional): mass of the AUV in kg , the default value is 100 kg
+    geometry(optional): precomputed ThrusterGeometry for alpha, used instead of rebuilding the thruster matrix
     """
 
+    profiler = instrumentation.active_profiler
+    if profiler is not None:
+        token = profiler.start()
     if type(T) != np.ndarray:
         raise TypeError("Input array must be a numpy array")
     if mass <= 0 or (T.shape[0] != 4 and T.ndim >= 1):
         raise ValueError(
             "The mass of the object must be a positive quantity, and the forces array must be a numpy array and have an entry for each thruster"
         )
-    r_alpha = np.array(
-        [
-            [np.cos(alpha), np.cos(alpha), -np.cos(alpha), -np.cos(alpha)],
-            [np.sin(alpha), -np.sin(alpha), -np.sin(alpha), np.sin(alpha)],
-        ]
-    )
+    if profiler is not None:
+        token = profiler.lap("auv2_acceleration.validation", token)
+    if geometry is None:
+        r_alpha = np.array(
+            [
+                [np.cos(alpha), np.cos(alpha), -np.cos(alpha), -np.cos(alpha)],
+                [np.sin(alpha), -np.sin(alpha), -np.sin(alpha), np.sin(alpha)],
+            ]
+        )
+    elif geometry.alpha != alpha:
+        raise ValueError("The thruster geometry must match alpha")
+    else:
+        r_alpha = geometry.allocation
     r_theta = np.array(
         [[np.cos(theta), -np.sin(theta)], [np.sin(theta), np.cos(theta)]]
     )
-    return np.dot(r_theta, np.dot(r_alpha, T)) / mass
+    if profiler is not None:
+        token = profiler.lap("auv2_acceleration.trig", token)
+    acceleration = np.dot(r_theta, np.dot(r_alpha, T)) / mass
+    if profiler is not None:
+        profiler.stop("auv2_acceleration.product", token)
+    return acceleration
 
 
-def calculate_auv2_angular_acceleration(T, alpha, L, l, inertia=100):
+def calculate_auv2_angular_acceleration(T, alpha, L, l, inertia=100, geometry=None):
     """
     Calculate the angular acceleration of the AUV given the forces applied by each of the four thrusters, the angle at which the thrusters are rotated, the angle at which the AUV is rotated, the dimensions of the AUV, and the rotational inertia of the AUV
 
@@ -188,6 +555,7 @@ def calculate_auv2_angular_acceleration(T, alpha, L, l, inertia=100):
     L: distance from the center of mass of the AUV to the thrusters on the major axis of the AUV in m
     l: distance from the center of mass of the AUV to the thrusters on the minor axis of the AUV in m
     inertia(optional): rotational inertia of the AUV, measured in kg*m^2
+    geometry(optional): precomputed ThrusterGeometry for (alpha, L, l), used instead of recomputing the lever term
     """
     if type(T) != np.ndarray:
         raise TypeError("Input array must be a numpy array")
@@ -195,19 +563,174 @@ def calculate_auv2_angular_acceleration(T, alpha, L, l, inertia=100):
         raise ValueError(
             "Dimensions of the AUV cannot be negative quantities, the forces array must be a numpy array and have four entries, and the inertia must be a positive quantitiy"
         )
-    r_rotation = np.array([1, -1, 1, -1])
-    sin_gamma = L * np.sin(alpha) + l * np.cos(alpha)
+    if geometry is None:
+        r_rotation = np.array([1, -1, 1, -1])
+        sin_gamma = L * np.sin(alpha) + l * np.cos(alpha)
+    elif not geometry.matches(alpha, L, l):
+        raise ValueError("The thruster geometry must match alpha, L, and l")
+    else:
+        r_rotation = geometry.rotation
+        sin_gamma = geometry.sin_gamma
     return np.dot(r_rotation.T, T) * sin_gamma / inertia
 
 
+class ThrusterAllocation:
+    """
+    Inverse of the AUV2 thruster model for a given geometry, mass, and inertia: holds the 3x4 matrix mapping the four thrusts onto the body frame accelerations (ax, ay, alpha_dot) and its Moore-Penrose pseudo-inverse, which gives the smallest thrusts producing a desired acceleration
+
+    alpha: angle of the thrusters in rad
+    L: distance from the center of mass of the AUV to the thrusters on the major axis of the AUV in m
+    l: distance from the center of mass of the AUV to the thrusters on the minor axis of the AUV in m
+    mass(optional): mass of the AUV in kg
+    inertia(optional): rotational inertia of the AUV in kg*m^2
+    """
+
+    def __init__(self, alpha: float, L: float, l: float, mass=100, inertia=100):
+        if L < 0 or l < 0 or mass <= 0 or inertia <= 0:
+            raise ValueError(
+                "Dimensions of the AUV cannot be negative quantities, and the mass and inertia must be positive quantities"
+            )
+        self.geometry = get_thruster_geometry(float(alpha), float(L), float(l))
+        self.mass = mass
+        self.inertia = inertia
+
+        self.matrix = np.vstack(
+            (
+                self.geometry.allocation / mass,
+                self.geometry.rotation * self.geometry.sin_gamma / inertia,
+            )
+        )
+        self.matrix.flags.writeable = False
+        self.pseudo_inverse = np.linalg.pinv(self.matrix)
+        self.pseudo_inverse.flags.writeable = False
+
+
+@lru_cache(maxsize=128)
+def get_thruster_allocation(alpha, L, l, mass=100, inertia=100):
+    """
+    Returns the ThrusterAllocation for (alpha, L, l, mass, inertia), reusing a previously built one, and so its pseudo-inverse, when the same geometry was requested recently
+
+    alpha: angle of the thrusters in rad
+    L: distance from the center of mass of the AUV to the thrusters on the major axis of the AUV in m
+    l: distance from the center of mass of the AUV to the thrusters on the minor axis of the AUV in m
+    mass(optional): mass of the AUV in kg
+    inertia(optional): rotational inertia of the AUV in kg*m^2
+    """
+
+    return ThrusterAllocation(alpha, L, l, mass, inertia)
+
+
+_SATURATION_MODES = ("clip", "scale")
+
+
+def allocate_auv2_thrusts(
+    accelerations,
+    alpha,
+    L,
+    l,
+    mass=100,
+    inertia=100,
+    theta=None,
+    T_min=None,
+    T_max=None,
+    saturation="clip",
+    allocation=None,
+):
+    """
+    Calculates the forces the four thrusters must apply for the AUV to reach desired linear and angular accelerations, the inverse of calculate_auv2_acceleration and calculate_auv2_angular_acceleration; returns an np.ndarray of shape (..., 4) in N
+
+    accelerations: np.ndarray of shape (3,) or (N, 3) holding the desired (ax, ay, alpha_dot) in m/s^2 and rad/s^2
+    alpha: angle of the thrusters in rad
+    L: distance from the center of mass of the AUV to the thrusters on the major axis of the AUV in m
+    l: distance from the center of mass of the AUV to the thrusters on the minor axis of the AUV in m
+    mass(optional): mass of the AUV in kg
+    inertia(optional): rotational inertia of the AUV in kg*m^2
+    theta(optional): angle of the AUV in rad, scalar or shape (N,); when given, (ax, ay) are taken in the global frame like the output of calculate_auv2_acceleration, otherwise in the body frame of the AUV
+    T_min(optional): lower limit of each thrust in N, scalar or shape (4,)
+    T_max(optional): upper limit of each thrust in N, scalar or shape (4,)
+    saturation(optional): "clip" to clip each thrust to its limits independently, or "scale" to shrink the whole thrust vector until it fits, which keeps the direction of the commanded acceleration and requires T_min <= 0 <= T_max
+    allocation(optional): precomputed ThrusterAllocation, used instead of looking one up from (alpha, L, l, mass, inertia)
+    """
+
+    if type(accelerations) != np.ndarray:
+        raise TypeError("Input array must be a numpy array")
+    if accelerations.shape[-1:] != (3,) or accelerations.ndim > 2:
+        raise ValueError("The accelerations array must have shape (3,) or (N, 3)")
+    if saturation not in _SATURATION_MODES:
+        raise ValueError(
+            f"Unknown saturation mode {saturation!r}, expected one of {', '.join(_SATURATION_MODES)}"
+        )
+    if allocation is None:
+        allocation = get_thruster_allocation(alpha, L, l, mass, inertia)
+
+    if theta is not None:
+        # Rotate the global accelerations back into the body frame of the AUV
+        cos_theta = np.cos(theta)
+        sin_theta = np.sin(theta)
+        ax = accelerations[..., 0]
+        ay = accelerations[..., 1]
+        accelerations = np.stack(
+            (
+                cos_theta * ax + sin_theta * ay,
+                -sin_theta * ax + cos_theta * ay,
+                np.broadcast_to(accelerations[..., 2], np.shape(ax * cos_theta)),
+            ),
+            axis=-1,
+        )
+
+    T = accelerations @ allocation.pseudo_inverse.T
+    if T_min is None and T_max is None:
+        return T
+
+    lower = -np.inf if T_min is None else np.asarray(T_min, dtype=float)
+    upper = np.inf if T_max is None else np.asarray(T_max, dtype=float)
+    if np.any(lower > upper):
+        raise ValueError("The lower thrust limits cannot exceed the upper limits")
+    if saturation == "clip":
+        return np.clip(T, lower, upper, out=T)
+
+    if np.any(lower > 0) or np.any(upper < 0):
+        raise ValueError(
+            "Scaling saturation requires limits with T_min <= 0 <= T_max for every thruster"
+        )
+    # Largest fraction of each thrust vector that stays within every limit
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(T > 0, upper / T, np.where(T < 0, lower / T, np.inf))
+    scale = np.minimum(ratio.min(axis=-1, keepdims=True), 1.0)
+    return np.multiply(T, scale, out=T)
+
+
 def simulate_auv2_motion(
-    T, alpha, L, l, inertia=100, mass=100, dt=0.1, t_final=10, x0=0, y0=0, theta0=0
+    T,
+    alpha,
+    L,
+    l,
+    inertia=100,
+    mass=100,
+    dt=0.1,
+    t_final=10,
+    x0=0,
+    y0=0,
+    theta0=0,
+    vectorized=False,
+    geometry=None,
+    integrator="euler",
+    rtol=1e-6,
+    atol=1e-9,
+    full_output=False,
+    events=None,
+    backend=None,
+    checkpoint_interval=None,
+    resume=None,
+    dtype=None,
+    out=None,
+    channels=None,
 ):
     """
     Simulates the motion of the AUV in the 2-D plane, returns numpy arrays of time, x and y positions, angular displacement, linear velocities on the x and y axes, angular velocity, and the linear acceleration; assume the AUV starts at the origin with an initial velocity of 0 m/s, with the ability to move and rotate in any direction simultaneously
 
-    T: np.ndarray of the magnitude of forces applied to the thrusters in rad
-    alpha: angle of the thruster relative to the x-axis in rad
+    T: np.ndarray of the magnitude of forces applied to the thrusters in rad, either constant with shape (4,) or a thrust schedule with shape (steps, 4) whose row i drives step i of the simulation
+    alpha: angle of the thruster relative to the x-axis in rad, either constant or an angle schedule with shape (steps,)
     L: distance from the center of mass of the AUV to the thrusters on the major axis of the AUV in m
     l: distance from the center of mass of the AUV to the thrusters on the minor axis of the AUV in m
     inertia(optional): rotational inertia of the AUV, measured in kg*m^2
@@ -216,6 +739,848 @@ def simulate_auv2_motion(
     x0(optional): initial x-position of the AUV in m
     y0(optional): initial y-position of the AUV
     theta0(optional): the initial angle of the AUV in rad
+    vectorized(optional): build the whole trajectory with cumulative-sum prefix scans instead of stepping in a Python loop; t, theta and omega match the stepped simulation bit-for-bit, and the remaining channels agree to within 1e-14 of each channel's largest magnitude since the heading rotation may round differently from np.dot
+    geometry(optional): precomputed ThrusterGeometry for (alpha, L, l); when omitted it is taken from the shared geometry cache, and it cannot be combined with an angle schedule
+    integrator(optional): "euler" for the semi-implicit Euler stepping, "rk4" for fourth order Runge-Kutta or "verlet" for velocity Verlet at a fixed dt, or "rk45" for adaptive Dormand-Prince steps starting from dt; the higher order integrators need a constant T and alpha, and report a as the acceleration at each returned state. The fixed-step integrators return the time grid np.arange(0, t_final, dt), which stops short of t_final, while "rk45" returns its accepted step times up to and including t_final, so the two generally differ in length, e.g. t_final=0.05 with dt=0.1 gives one row against two
+    rtol(optional): relative error tolerance of each "rk45" step
+    atol(optional): absolute error tolerance of each "rk45" step
+    full_output(optional): also return a dict with the integrator used, the number of accepted steps, which is one less than the number of returned rows and for "rk45" includes the step ending at t_final, the number of rejected "rk45" steps, and the index and time of the event that ended the run, or None when it ran to t_final
+    events(optional): sequence of event functions f(t, x, y, theta, v, omega) that can end the simulation early, e.g. from waypoint_event, bounding_box_event, or pressure_limit_event; each must accept arrays of states as well as single states, and either return booleans, ending the run at the first step where it is True, or numbers, ending the run at the first step where it changes sign, with the event time interpolated between steps; the returned arrays stop at the step where the first event fired, and only the Euler integrator supports events
+    backend(optional): "numba" to run the stepped Euler loop as a compiled kernel, "numpy" for the NumPy loop, or "auto" to use numba when it is installed; defaults to the AUV2_BACKEND environment variable, or "auto" when it is unset; runs with events or profiling always use the NumPy loop, and the compiled kernel matches it to within floating point rounding
+    checkpoint_interval(optional): number of steps between the AUV2Checkpoints listed under "checkpoints" in the full_output dict, taken at every step index that is a multiple of it
+    resume(optional): AUV2Checkpoint to continue a run from, e.g. with new inputs after a change of plan; the returned arrays start at the checkpointed step, whose row is the checkpoint itself, and thrust or angle schedules then have an entry for each returned row; needs the dt of the checkpointed run and the Euler integrator
+    dtype(optional): floating point type the returned channels other than t are stored in, e.g. np.float32 to halve their memory; the state is always accumulated in float64, so float32 storage only rounds each stored value, to a relative error of about 6e-8 of its magnitude, and the error does not grow over the run
+    out(optional): array of shape (steps, columns) the returned channels other than t are written into and returned as views of, e.g. a caller-owned buffer or np.memmap; columns follow AUV2_STATE_COLUMNS restricted to the selected channels, its dtype is used for storage, and it cannot be combined with "rk45" since that chooses its own number of steps
+    channels(optional): one or more names from AUV2_OUTPUT_CHANNELS to return, in that order, so unused channels such as v or a are never stored; events need x, y, theta, v and omega, and checkpoints need every channel. The stepped loop and the vectorized path without events write straight into the output block, so dtype and channels cut their peak memory; the higher order integrators and vectorized runs with events still build the full float64 trajectory first and only shrink what is returned
+    """
+
+    profiler = instrumentation.active_profiler
+    if profiler is not None:
+        token = profiler.start()
+
+    t = np.arange(0, t_final, dt)
+    if resume is not None:
+        if resume.dt != dt:
+            raise ValueError("A run can only be resumed with the dt it was run with")
+        if resume.step >= len(t):
+            raise ValueError("The checkpoint lies beyond t_final")
+        t = t[resume.step :]
+    geometry = _check_auv2_motion_inputs(
+        T, alpha, L, l, inertia, mass, dt, t_final, geometry, len(t)
+    )
+
+    if integrator not in _AUV2_INTEGRATORS:
+        raise ValueError(f"Unknown integrator, expected one of {_AUV2_INTEGRATORS}")
+    if integrator != "euler" and (
+        vectorized
+        or T.ndim == 2
+        or np.ndim(alpha) == 1
+        or events
+        or checkpoint_interval is not None
+        or resume is not None
+    ):
+        raise ValueError(
+            "Only the Euler integrator supports the vectorized path, events, checkpoints, and thrust or thruster angle schedules"
+        )
+    if checkpoint_interval is not None and checkpoint_interval <= 0:
+        raise ValueError("The checkpoint interval must be a positive quantity")
+    packing = dtype is not None or out is not None or channels is not None
+    if packing:
+        channels = _check_auv2_output(channels, dtype, out, len(t), integrator)
+        if (events and not {"x", "y", "theta", "v", "omega"} <= set(channels)) or (
+            checkpoint_interval is not None
+            and len(channels) != len(AUV2_OUTPUT_CHANNELS)
+        ):
+            raise ValueError(
+                "Events need the x, y, theta, v and omega channels, and checkpoints need every channel"
+            )
+    else:
+        channels = AUV2_OUTPUT_CHANNELS
+    first_step = 0 if resume is None else resume.step
+
+    if profiler is not None:
+        token = profiler.lap("simulate.validation", token)
+
+    if integrator != "euler":
+        body, a_angular = _auv2_forcing(T, alpha, L, l, inertia, geometry)
+        initial = np.array([x0, y0, theta0, 0.0, 0.0, 0.0], dtype=float)
+        if integrator == "rk45":
+            t, state, rejected = _integrate_auv2_rk45(
+                body, a_angular, mass, dt, t_final, initial, rtol, atol
+            )
+        else:
+            state = _AUV2_FIXED_STEP_INTEGRATORS[integrator](
+                body, a_angular, mass, dt, len(t), initial
+            )
+            rejected = 0
+        a = _auv2_heading_acceleration(state[:, 2], body, mass).T
+        result = (
+            t,
+            state[:, 0],
+            state[:, 1],
+            state[:, 2],
+            state[:, 3:5],
+            state[:, 5],
+            a,
+        )
+        info = {
+            "integrator": integrator,
+            "steps": max(len(t) - 1, 0),
+            "rejected_steps": rejected,
+        }
+        if packing:
+            result = _AUV2OutputBlock.pack(result, channels, dtype, out)
+        if profiler is not None:
+            profiler.stop("simulate.integration", token)
+        return result + (info,) if full_output else result
+
+    event = None
+    if vectorized:
+        body, a_angular = _auv2_forcing(T, alpha, L, l, inertia, geometry)
+        initial = (x0, y0, theta0, np.zeros(2), 0.0)
+        if resume is not None:
+            initial = (*resume.state[:3], resume.state[3:5].copy(), resume.state[5])
+        if events:
+            result, event = _simulate_auv2_motion_until_event(
+                body,
+                a_angular,
+                mass,
+                dt,
+                len(t),
+                initial,
+                events,
+                first_step=first_step,
+            )
+            if packing:
+                result = _AUV2OutputBlock.pack(result, channels, dtype, out)
+        elif packing:
+            # The trajectory is built in chunks written straight into the output block,
+            # so the float64 channels are only ever held one chunk at a time
+            block = _AUV2OutputBlock(channels, len(t), dtype, out)
+            start = 0
+            for chunk in _generate_auv2_motion_chunks(
+                body, a_angular, mass, dt, len(t), initial, _AUV2_CHUNK_SIZE, first_step
+            ):
+                block.store_rows(start, chunk)
+                start += len(chunk[0])
+            result = block.views(t)
+        else:
+            result = (t,) + _auv2_prefix_scan(
+                body, a_angular, mass, dt, len(t), initial, initial=True
+            )
+        # The prefix scan cannot recover the acceleration the checkpointed run
+        # stored in its first row, so it is taken from the checkpoint
+        if resume is not None and "a" in channels and len(result[0]):
+            result[-1][0] = resume.state[6:]
+        if profiler is not None:
+            profiler.stop("simulate.prefix_scan", token)
+    else:
+        # Every step writes one contiguous row of the state block, and the returned
+        # channels are views of its columns
+        block = _AUV2OutputBlock(channels, len(t), dtype, out)
+        if profiler is not None:
+            profiler.stop("simulate.allocation", token)
+        stop, event = _step_auv2_motion(
+            block,
+            t,
+            T,
+            alpha,
+            L,
+            l,
+            inertia,
+            mass,
+            dt,
+            geometry,
+            (x0, y0, theta0),
+            resume,
+            events,
+            backend,
+            profiler,
+        )
+        result = block.views(t, stop)
+
+    return _auv2_euler_output(
+        result, full_output, event, checkpoint_interval, first_step, dt
+    )
+
+
+def _step_auv2_motion(
+    block,
+    t,
+    T,
+    alpha,
+    L,
+    l,
+    inertia,
+    mass,
+    dt,
+    geometry,
+    initial,
+    resume,
+    events,
+    backend,
+    profiler,
+):
+    """
+    Runs the stepped Euler loop of simulate_auv2_motion, writing each step into an _AUV2OutputBlock; returns the number of rows written, or None when the run reached t_final, and the event that ended the run, or None
+    """
+
+    if len(t) == 0:
+        return None, None
+
+    # Constant inputs are shared by every step; schedules are indexed per step
+    scheduled = T.ndim == 2 or np.ndim(alpha) == 1
+    thrust = (lambda i: T[i]) if T.ndim == 2 else (lambda i: T)
+    angle = (lambda i: alpha[i]) if np.ndim(alpha) == 1 else (lambda i: alpha)
+
+    a_angular = calculate_auv2_angular_acceleration(
+        thrust(0), angle(0), L, l, inertia, geometry
+    )
+    if resume is None:
+        row = (
+            tuple(initial)
+            + (0.0, 0.0, 0.0)
+            + tuple(
+                calculate_auv2_acceleration(
+                    thrust(0), angle(0), initial[2], mass, geometry
+                ).tolist()
+            )
+        )
+    else:
+        row = tuple(resume.state.tolist())
+    block.store_row(0, row)
+
+    kernel = _select_auv2_backend(backend)
+    if kernel is not None and not events and profiler is None and block.full:
+        body, a_angular = _auv2_forcing(T, alpha, L, l, inertia, geometry)
+        kernel(
+            np.broadcast_to(body, (len(t), 2)),
+            np.broadcast_to(np.asarray(a_angular, dtype=float), (len(t),)),
+            float(mass),
+            float(dt),
+            block.block,
+        )
+        return None, None
+
+    if events:
+        _, x, y, theta, v, omega = block.views(t, channels=AUV2_OUTPUT_CHANNELS[:6])
+        event = _detect_auv2_event(
+            events, t[:1], x[:1], y[:1], theta[:1], v[:1], omega[:1], True
+        )
+        if event is not None:
+            return 1, event
+
+    # The state of the previous step is carried in Python floats, and each step
+    # writes its whole row of the state block in a single assignment
+    x_i, y_i, theta_i, vx_i, vy_i, omega_i = (float(value) for value in row[:6])
+    store_row = block.store_row
+    for i in range(1, len(t)):
+        if scheduled:
+            a_angular = calculate_auv2_angular_acceleration(
+                thrust(i), angle(i), L, l, inertia, geometry
+            )
+        ax_i, ay_i = calculate_auv2_acceleration(
+            thrust(i), angle(i), theta_i, mass, geometry
+        ).tolist()
+        if profiler is not None:
+            token = profiler.start()
+        omega_i = omega_i + a_angular * dt
+        vx_i = vx_i + ax_i * dt
+        vy_i = vy_i + ay_i * dt
+        x_i = x_i + vx_i * dt
+        y_i = y_i + vy_i * dt
+        theta_i = theta_i + omega_i * dt
+        store_row(i, (x_i, y_i, theta_i, vx_i, vy_i, omega_i, ax_i, ay_i))
+        if profiler is not None:
+            profiler.stop("simulate.state_update", token)
+        if events:
+            window = slice(i - 1, i + 1)
+            event = _detect_auv2_event(
+                events,
+                t[window],
+                x[window],
+                y[window],
+                theta[window],
+                v[window],
+                omega[window],
+            )
+            if event is not None:
+                return i + 1, event
+
+    return None, None
+
+
+_AUV2_BACKENDS = ("auto", "numpy", "numba")
+
+
+def _select_auv2_backend(backend):
+    """
+    Returns the compiled Euler kernel for the requested backend, or None to use the NumPy loop
+    """
+
+    if backend is None:
+        backend = os.environ.get("AUV2_BACKEND", "auto")
+    if backend not in _AUV2_BACKENDS:
+        raise ValueError(f"Unknown backend, expected one of {_AUV2_BACKENDS}")
+    if backend == "numpy":
+        return None
+    kernel = _load_auv2_kernel()
+    if kernel is None and backend == "numba":
+        raise ImportError("The numba backend requires numba to be installed")
+    return kernel
+
+
+@lru_cache(maxsize=None)
+def _load_auv2_kernel():
+    """
+    Imports the compiled Euler kernel once per process, returning None when numba is not installed; failed imports are not cached by Python, so without this every default run would search for the module again
+    """
+
+    try:
+        import auv2_numba
+    except ImportError:
+        return None
+    return auv2_numba.euler_kernel
+
+
+# Columns of the state block the stepped simulation writes
+AUV2_STATE_COLUMNS = ("x", "y", "theta", "vx", "vy", "omega", "ax", "ay")
+
+
+def auv2_state_channels(state):
+    """
+    Returns views of the x, y, theta, v, omega, and a channels of a state block with AUV2_STATE_COLUMNS columns, in the order simulate_auv2_motion returns them
+
+    state: np.ndarray of shape (steps, 8)
+    """
+
+    return (
+        state[:, 0],
+        state[:, 1],
+        state[:, 2],
+        state[:, 3:5],
+        state[:, 5],
+        state[:, 6:8],
+    )
+
+
+class AUV2Checkpoint:
+    """
+    Compact snapshot of a stepped AUV2 run: the step index, the time step, and the x, y, theta, vx, vy, omega, ax, and ay of the step, enough for simulate_auv2_motion to resume the run from it; serializes to 80 bytes
+
+    step: index of the checkpointed step from the start of the run
+    dt: time step of the run in s
+    state: sequence of the AUV2_STATE_COLUMNS values of the step
+    """
+
+    __slots__ = ("step", "dt", "state")
+    _FORMAT = struct.Struct("<q9d")
+
+    def __init__(self, step: int, dt: float, state):
+        self.step = step
+        self.dt = dt
+        self.state = np.array(state, dtype=float)
+        if self.state.shape != (len(AUV2_STATE_COLUMNS),):
+            raise ValueError(
+                f"The state must have an entry for each of {AUV2_STATE_COLUMNS}"
+            )
+
+    @property
+    def time(self) -> float:
+        return self.step * self.dt
+
+    @classmethod
+    def from_trajectory(cls, trajectory, index: int, dt: float):
+        """
+        Returns the checkpoint of one row of a trajectory returned by simulate_auv2_motion
+
+        trajectory: (t, x, y, theta, v, omega, a) tuple
+        index: row of the trajectory to checkpoint
+        dt: time step of the run in s
+        """
+
+        t, x, y, theta, v, omega, a = trajectory[:7]
+        return cls(
+            round(float(t[index]) / dt),
+            dt,
+            (x[index], y[index], theta[index], *v[index], omega[index], *a[index]),
+        )
+
+    def to_bytes(self) -> bytes:
+        return self._FORMAT.pack(self.step, self.dt, *self.state.tolist())
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        step, dt, *state = cls._FORMAT.unpack(data)
+        return cls(step, dt, state)
+
+    def __eq__(self, other):
+        if not isinstance(other, AUV2Checkpoint):
+            return NotImplemented
+        return (self.step, self.dt, self.state.tolist()) == (
+            other.step,
+            other.dt,
+            other.state.tolist(),
+        )
+
+    def __repr__(self):
+        return f"AUV2Checkpoint(step={self.step}, dt={self.dt}, state={self.state.tolist()})"
+
+
+class AUV2Stepper:
+    """
+    Advances one AUV through the same semi-implicit Euler steps as simulate_auv2_motion, one step per call, for fixed-rate control loops; the current state lives in a preallocated array with AUV2_STATE_COLUMNS entries that every step overwrites in place, and the thruster geometry is folded into a few constants up front, so a step allocates no arrays
+
+    alpha: angle of the thrusters in rad
+    L: distance from the center of mass of the AUV to the thrusters on the major axis of the AUV in m
+    l: distance from the center of mass of the AUV to the thrusters on the minor axis of the AUV in m
+    inertia(optional): rotational inertia of the AUV in kg*m^2
+    mass(optional): mass of the AUV in kg
+    x0(optional): initial x-position of the AUV in m
+    y0(optional): initial y-position of the AUV in m
+    theta0(optional): initial angle of the AUV in rad
+    geometry(optional): precomputed ThrusterGeometry for (alpha, L, l)
+    """
+
+    __slots__ = (
+        "geometry",
+        "mass",
+        "inertia",
+        "state",
+        "time",
+        "_body_x",
+        "_body_y",
+        "_lever",
+    )
+
+    def __init__(
+        self,
+        alpha,
+        L,
+        l,
+        inertia=100,
+        mass=100,
+        x0=0,
+        y0=0,
+        theta0=0,
+        geometry=None,
+    ):
+        if (inertia <= 0 or mass <= 0) or (L <= 0 or l <= 0):
+            raise ValueError(
+                "The mass and inertia of the object must be a positive quantity, and distances must be positive quantities"
+            )
+        if geometry is None:
+            geometry = get_thruster_geometry(float(alpha), float(L), float(l))
+        elif not geometry.matches(alpha, L, l):
+            raise ValueError("The thruster geometry must match alpha, L, and l")
+        self.geometry = geometry
+        self.mass = mass
+        self.inertia = inertia
+        # Body frame acceleration and angular acceleration per N of each thrust combination
+        self._body_x = float(geometry.allocation[0, 0]) / mass
+        self._body_y = float(geometry.allocation[1, 0]) / mass
+        self._lever = float(geometry.sin_gamma) / inertia
+        self.state = np.zeros(len(AUV2_STATE_COLUMNS))
+        self.reset(x0, y0, theta0)
+
+    def reset(self, x0=0, y0=0, theta0=0):
+        """
+        Puts the AUV back at rest at the given position and angle, at time 0
+        """
+
+        self.state[:] = 0
+        self.state[:3] = (x0, y0, theta0)
+        self.time = 0.0
+
+    def step(self, T, dt):
+        """
+        Advances the AUV by one time step under constant thrust and returns the state array, updated in place
+
+        T: np.ndarray of the forces applied by the four thrusters during the step in N
+        dt: time step in s
+        """
+
+        if type(T) != np.ndarray:
+            raise TypeError("Input array must be a numpy array")
+        if dt < 0:
+            raise ValueError("Time cannot be a negative quantity")
+        t0, t1, t2, t3 = T.tolist()
+        body_x = self._body_x * (t0 + t1 - t2 - t3)
+        body_y = self._body_y * (t0 - t1 - t2 + t3)
+
+        state = self.state
+        x, y, theta, vx, vy, omega, _, _ = state.tolist()
+        # The acceleration of the step follows the heading at its start, as in simulate_auv2_motion
+        cos_theta = math.cos(theta)
+        sin_theta = math.sin(theta)
+        ax = cos_theta * body_x - sin_theta * body_y
+        ay = sin_theta * body_x + cos_theta * body_y
+        omega += self._lever * (t0 - t1 + t2 - t3) * dt
+        vx += ax * dt
+        vy += ay * dt
+        x += vx * dt
+        y += vy * dt
+        theta += omega * dt
+        state[:] = (x, y, theta, vx, vy, omega, ax, ay)
+        self.time += dt
+        return state
+
+
+# Channels simulate_auv2_motion returns, and the state block columns each is stored in
+AUV2_OUTPUT_CHANNELS = ("t", "x", "y", "theta", "v", "omega", "a")
+_AUV2_CHANNEL_COLUMNS = {
+    "x": (0,),
+    "y": (1,),
+    "theta": (2,),
+    "v": (3, 4),
+    "omega": (5,),
+    "a": (6, 7),
+}
+
+
+# Steps built at a time when the vectorized path writes into a narrower output block
+_AUV2_CHUNK_SIZE = 4096
+
+
+def _check_auv2_output(channels, dtype, out, steps, integrator):
+    """
+    Validates the output options of simulate_auv2_motion and returns the selected channels in AUV2_OUTPUT_CHANNELS order
+    """
+
+    if channels is None:
+        channels = AUV2_OUTPUT_CHANNELS
+    unknown = set(channels) - set(AUV2_OUTPUT_CHANNELS)
+    if unknown:
+        raise ValueError(
+            f"Unknown channels {sorted(unknown)}, expected names from {AUV2_OUTPUT_CHANNELS}"
+        )
+    channels = tuple(name for name in AUV2_OUTPUT_CHANNELS if name in channels)
+    if not channels:
+        raise ValueError("At least one channel must be selected")
+    if dtype is not None and np.dtype(dtype).kind != "f":
+        raise ValueError("Channels can only be stored in a floating point type")
+    if out is not None:
+        width = sum(len(_AUV2_CHANNEL_COLUMNS.get(name, ())) for name in channels)
+        if integrator == "rk45":
+            raise ValueError("The rk45 integrator cannot write into an out array")
+        if type(out) not in (np.ndarray, np.memmap) or out.dtype.kind != "f":
+            raise TypeError("The out array must be a floating point numpy array")
+        if out.shape != (steps, width):
+            raise ValueError(
+                f"The out array must have shape {(steps, width)} for the selected channels"
+            )
+        if dtype is not None and out.dtype != np.dtype(dtype):
+            raise ValueError("The out array must have the requested dtype")
+    return channels
+
+
+class _AUV2OutputBlock:
+    """
+    State block the selected channels of simulate_auv2_motion are stored in, with one row per step holding the AUV2_STATE_COLUMNS of those channels; the returned channels are views of its columns
+
+    channels: names from AUV2_OUTPUT_CHANNELS, in that order
+    steps: number of rows of the block
+    dtype(optional): floating point type of the block, float64 when omitted
+    out(optional): caller-owned array of shape (steps, columns) to use as the block
+    """
+
+    def __init__(self, channels, steps, dtype=None, out=None):
+        self.channels = channels
+        self.columns = tuple(
+            column
+            for name in channels
+            for column in _AUV2_CHANNEL_COLUMNS.get(name, ())
+        )
+        self.full = len(self.columns) == len(AUV2_STATE_COLUMNS)
+        if out is None:
+            out = np.zeros(
+                (steps, len(self.columns)), dtype=float if dtype is None else dtype
+            )
+        self.block = out
+        # Picks the stored columns out of a full state row when channels are left out
+        if self.full:
+            self._pick = None
+        elif self.columns:
+            self._pick = itemgetter(*self.columns)
+        else:
+            self._pick = lambda row: ()
+
+    @classmethod
+    def pack(cls, result, channels, dtype=None, out=None):
+        """
+        Stores the selected channels of a full float64 trajectory in a new block and returns views of it
+        """
+
+        steps = len(result[0])
+        block = cls(channels, steps, dtype, None if out is None else out[:steps])
+        block.store_rows(0, result)
+        return block.views(result[0])
+
+    def store_row(self, index, row):
+        """
+        Writes one full state row, ordered as AUV2_STATE_COLUMNS, into row index of the block
+        """
+
+        self.block[index] = row if self._pick is None else self._pick(row)
+
+    def store_rows(self, start, result):
+        """
+        Writes the selected channels of a float64 trajectory, or of one chunk of it, into the rows of the block starting at start
+        """
+
+        rows = self.block[start : start + len(result[0])]
+        for name, channel in zip(AUV2_OUTPUT_CHANNELS[1:], result[1:]):
+            if name in self.channels:
+                rows[:, self._slice(name)] = channel
+
+    def views(self, t, stop=None, channels=None):
+        """
+        Returns the selected channels of the first stop rows as t followed by views of the columns of the block, in AUV2_OUTPUT_CHANNELS order
+
+        channels(optional): subset of the stored channels to return instead of all of them
+        """
+
+        block = self.block[:stop]
+        return tuple(
+            t[:stop] if name == "t" else block[:, self._slice(name)]
+            for name in (self.channels if channels is None else channels)
+        )
+
+    def _slice(self, name):
+        first = self.columns.index(_AUV2_CHANNEL_COLUMNS[name][0])
+        if len(_AUV2_CHANNEL_COLUMNS[name]) == 1:
+            return first
+        return slice(first, first + len(_AUV2_CHANNEL_COLUMNS[name]))
+
+
+def _auv2_euler_output(
+    result, full_output, event=None, checkpoint_interval=None, first_step=0, dt=None
+):
+    if not full_output:
+        return result
+    steps = max(len(result[0]) - 1, 0)
+    info = {"integrator": "euler", "steps": steps, "rejected_steps": 0}
+    info["event"], info["event_time"] = event[1:] if event is not None else (None, None)
+    info["checkpoints"] = (
+        []
+        if checkpoint_interval is None
+        else [
+            AUV2Checkpoint.from_trajectory(result, row, dt)
+            for row in range(
+                -first_step % checkpoint_interval, len(result[0]), checkpoint_interval
+            )
+        ]
+    )
+    return result + (info,)
+
+
+def _detect_auv2_event(events, t, x, y, theta, v, omega, first=False):
+    """
+    Evaluates the event functions over a window of consecutive states whose first row is known not to have ended the simulation, unless first is set, and returns (row, event index, event time) for the earliest event that fired, or None
+    """
+
+    fired = None
+    for number, event in enumerate(events):
+        values = np.asarray(event(t, x, y, theta, v, omega))
+        if values.dtype == bool:
+            rows = np.flatnonzero(values if first else values[1:]) + (0 if first else 1)
+            if len(rows) and (fired is None or rows[0] < fired[0]):
+                fired = (rows[0], number, t[rows[0]])
+            continue
+
+        signs = np.sign(values)
+        rows = np.flatnonzero((signs[1:] != signs[:-1]) & (signs[:-1] != 0)) + 1
+        if len(rows) and (fired is None or rows[0] < fired[0]):
+            row = rows[0]
+            before = values[row - 1]
+            after = values[row]
+            event_time = t[row - 1] + (t[row] - t[row - 1]) * before / (before - after)
+            fired = (row, number, event_time)
+    return fired
+
+
+def _simulate_auv2_motion_until_event(
+    body, a_angular, mass, dt, steps, initial, events, chunk_size=1024, first_step=0
+):
+    """
+    Builds the trajectory chunk by chunk with prefix scans, evaluating the event functions on each chunk at once and stopping at the first chunk in which one fires; returns the truncated trajectory and the event, or None
+    """
+
+    chunks = []
+    last = None
+    for chunk in _generate_auv2_motion_chunks(
+        body, a_angular, mass, dt, steps, initial, chunk_size, first_step
+    ):
+        if last is None:
+            window = chunk[:6]
+            offset = 0
+        else:
+            window = [
+                np.concatenate((previous[-1:], current))
+                for previous, current in zip(last, chunk[:6])
+            ]
+            offset = 1
+        event = _detect_auv2_event(events, *window, first=last is None)
+        if event is not None:
+            row = event[0] - offset
+            chunks.append(tuple(channel[: row + 1] for channel in chunk))
+            break
+        chunks.append(chunk)
+        last = chunk
+    else:
+        event = None
+
+    if not chunks:
+        empty = np.empty(0)
+        return (
+            empty,
+            empty,
+            empty,
+            empty,
+            np.empty((0, 2)),
+            empty,
+            np.empty((0, 2)),
+        ), None
+    return tuple(np.concatenate(channel) for channel in zip(*chunks)), event
+
+
+def _auv2_heading_acceleration(theta, body, mass):
+    """
+    Returns the linear acceleration of the AUV in the global frame at heading theta, given the thrust resolved onto the x and y axes of the AUV
+    """
+
+    cos_theta = np.cos(theta)
+    sin_theta = np.sin(theta)
+    return (
+        np.array(
+            [
+                cos_theta * body[0] - sin_theta * body[1],
+                sin_theta * body[0] + cos_theta * body[1],
+            ]
+        )
+        / mass
+    )
+
+
+def _auv2_derivative(state, body, a_angular, mass):
+    """
+    Returns the time derivative of the AUV state (x, y, theta, vx, vy, omega)
+    """
+
+    ax, ay = _auv2_heading_acceleration(state[2], body, mass)
+    return np.array([state[3], state[4], state[5], ax, ay, a_angular])
+
+
+def _integrate_auv2_rk4(body, a_angular, mass, dt, steps, initial):
+    state = np.empty((steps, 6))
+    state[:1] = initial
+    for i in range(1, steps):
+        s = state[i - 1]
+        k1 = _auv2_derivative(s, body, a_angular, mass)
+        k2 = _auv2_derivative(s + 0.5 * dt * k1, body, a_angular, mass)
+        k3 = _auv2_derivative(s + 0.5 * dt * k2, body, a_angular, mass)
+        k4 = _auv2_derivative(s + dt * k3, body, a_angular, mass)
+        state[i] = s + dt / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+    return state
+
+
+def _integrate_auv2_verlet(body, a_angular, mass, dt, steps, initial):
+    state = np.empty((steps, 6))
+    state[:1] = initial
+    if steps == 0:
+        return state
+    a = _auv2_heading_acceleration(initial[2], body, mass)
+    for i in range(1, steps):
+        x, y, theta, vx, vy, omega = state[i - 1]
+        theta_next = theta + omega * dt + 0.5 * a_angular * dt**2
+        a_next = _auv2_heading_acceleration(theta_next, body, mass)
+        state[i] = (
+            x + vx * dt + 0.5 * a[0] * dt**2,
+            y + vy * dt + 0.5 * a[1] * dt**2,
+            theta_next,
+            vx + 0.5 * (a[0] + a_next[0]) * dt,
+            vy + 0.5 * (a[1] + a_next[1]) * dt,
+            omega + a_angular * dt,
+        )
+        a = a_next
+    return state
+
+
+# Dormand-Prince 5(4) coefficients; the dynamics are autonomous so the nodes are not needed
+_DOPRI_A = (
+    (),
+    (1 / 5,),
+    (3 / 40, 9 / 40),
+    (44 / 45, -56 / 15, 32 / 9),
+    (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+    (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+    (35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84),
+)
+_DOPRI_ERROR = (
+    35 / 384 - 5179 / 57600,
+    0,
+    500 / 1113 - 7571 / 16695,
+    125 / 192 - 393 / 640,
+    -2187 / 6784 + 92097 / 339200,
+    11 / 84 - 187 / 2100,
+    -1 / 40,
+)
+
+
+def _integrate_auv2_rk45(body, a_angular, mass, dt, t_final, initial, rtol, atol):
+    """
+    Integrates the AUV state from 0 s to t_final with adaptive Dormand-Prince steps, returning the accepted step times and states and the number of rejected steps
+    """
+
+    if t_final == 0:
+        # No time elapses, so like the fixed-step integrators there is no step to return
+        return (np.empty(0), np.empty((0, len(initial))), 0)
+    t = [0.0]
+    states = [initial]
+    rejected = 0
+    h = dt
+    k_first = _auv2_derivative(initial, body, a_angular, mass)
+    while t[-1] < t_final:
+        h = min(h, t_final - t[-1])
+        if t[-1] + h == t[-1]:
+            raise RuntimeError("The adaptive step size underflowed")
+        s = states[-1]
+        k = [k_first]
+        for row in _DOPRI_A[1:]:
+            k.append(
+                _auv2_derivative(
+                    s + h * np.dot(row, k[: len(row)]), body, a_angular, mass
+                )
+            )
+        s_next = s + h * np.dot(_DOPRI_A[-1], k[:6])
+        error = h * np.dot(_DOPRI_ERROR, k)
+        scale = atol + rtol * np.maximum(np.abs(s), np.abs(s_next))
+        error_norm = np.sqrt(np.mean((error / scale) ** 2))
+
+        if error_norm <= 1:
+            t.append(t[-1] + h)
+            states.append(s_next)
+            # The last stage is evaluated at the accepted state and starts the next step
+            k_first = k[-1]
+        else:
+            rejected += 1
+        h *= min(5.0, max(0.2, 0.9 * error_norm ** (-1 / 5) if error_norm else 5.0))
+
+    return (np.array(t), np.array(states), rejected)
+
+
+_AUV2_FIXED_STEP_INTEGRATORS = {
+    "rk4": _integrate_auv2_rk4,
+    "verlet": _integrate_auv2_verlet,
+}
+_AUV2_INTEGRATORS = ("euler", "rk4", "verlet", "rk45")
+
+
+def _check_auv2_motion_inputs(
+    T, alpha, L, l, inertia, mass, dt, t_final, geometry, steps=None
+):
+    """
+    Validates the inputs shared by the AUV2 motion simulators and returns the thruster geometry to simulate with, or None when the thrusters follow an angle schedule; schedules are only accepted when the number of simulation steps is given
     """
 
     if type(T) != np.ndarray:
@@ -224,37 +1589,511 @@ def simulate_auv2_motion(
         (inertia <= 0 or mass <= 0)
         or (L <= 0 or l <= 0)
         or (dt < 0 or t_final < 0)
-        or (T.shape[0] != 4 and T.ndim >= 1)
+        or (T.shape[-1] != 4 and T.ndim >= 1)
     ):
         raise ValueError(
             "The mass and inertia of the object must be a positive quantity, distances must be positive quantities, time cannot be a negative quantity, and the forces array must be a numpy array and have an entry for each thruster"
         )
 
+    if T.ndim == 2 or np.ndim(alpha) == 1:
+        if steps is None:
+            raise ValueError("Thrust and thruster angle schedules are not supported")
+        if (T.ndim == 2 and T.shape[0] != steps) or (
+            np.ndim(alpha) == 1 and len(alpha) != steps
+        ):
+            raise ValueError("Schedules must have an entry for each simulation step")
+    if T.ndim > 2 or np.ndim(alpha) > 1:
+        raise ValueError("Schedules must have an entry for each simulation step")
+
+    if np.ndim(alpha) == 1:
+        if geometry is not None:
+            raise ValueError("A thruster geometry cannot follow an angle schedule")
+        return None
+    if geometry is None:
+        # 0-d arrays are unhashable, so the cache is keyed by plain floats
+        return get_thruster_geometry(float(alpha), float(L), float(l))
+    if not geometry.matches(alpha, L, l):
+        raise ValueError("The thruster geometry must match alpha, L, and l")
+    return geometry
+
+
+def _auv2_forcing(T, alpha, L, l, inertia, geometry):
+    """
+    Returns the thrust resolved onto the x and y axes of the AUV and the angular acceleration it causes, with one row per step when the thrust or thruster angle follows a schedule
+    """
+
+    if geometry is not None and T.ndim == 1:
+        body = np.dot(geometry.allocation, T)
+        return (body, np.dot(geometry.rotation.T, T) * geometry.sin_gamma / inertia)
+
+    cos_alpha = np.cos(alpha)
+    sin_alpha = np.sin(alpha)
+    T = np.atleast_2d(T)
+    body = np.empty((max(len(T), np.size(alpha)), 2))
+    body[:, 0] = cos_alpha * (T[:, 0] + T[:, 1] - T[:, 2] - T[:, 3])
+    body[:, 1] = sin_alpha * (T[:, 0] - T[:, 1] - T[:, 2] + T[:, 3])
+    sin_gamma = L * sin_alpha + l * cos_alpha
+    a_angular = (T[:, 0] - T[:, 1] + T[:, 2] - T[:, 3]) * sin_gamma / inertia
+    return (body, a_angular)
+
+
+def expand_segment_schedule(segment_starts, segment_values, dt=0.1, t_final=10):
+    """
+    Expands a piecewise-constant segment table into a per-step schedule for simulate_auv2_motion, filling a single array in one pass
+
+    segment_starts: increasing times in s at which each segment begins; the first segment must begin at or before 0 s
+    segment_values: value held during each segment, e.g. rows of four thrusts or thruster angles in rad
+    dt(optional): time step of the simulation in s
+    t_final(optional): final time of the simulation in s
+    """
+
+    segment_starts = np.asarray(segment_starts, dtype=float)
+    segment_values = np.asarray(segment_values, dtype=float)
+    if (
+        segment_starts.ndim != 1
+        or len(segment_starts) == 0
+        or len(segment_starts) != len(segment_values)
+    ):
+        raise ValueError("Each segment must have a start time and a value")
+    if segment_starts[0] > 0 or np.any(np.diff(segment_starts) <= 0):
+        raise ValueError(
+            "Segment start times must be increasing, and the first segment must begin at or before 0 s"
+        )
+
     t = np.arange(0, t_final, dt)
-    x = np.zeros_like(t)
-    y = np.zeros_like(t)
-    theta = np.zeros_like(t)
-    v = np.zeros((len(t), 2))
-    omega = np.zeros_like(t)
-    a = np.zeros((len(t), 2))
-
-    x[0] = x0
-    y[0] = y0
-    theta[0] = theta0
-    a_angular = calculate_auv2_angular_acceleration(T, alpha, L, l, inertia)
-    a[0] = calculate_auv2_acceleration(T, alpha, theta0, inertia)
+    return np.take(
+        segment_values, np.searchsorted(segment_starts, t, side="right") - 1, axis=0
+    )
 
-    for i in range(1, len(t)):
-        omega[i] = omega[i - 1] + a_angular * dt
-        a[i] = calculate_auv2_acceleration(T, alpha, theta[i], mass)
-        v[i] = v[i - 1] + a[i] * dt
-        x[i] = x[i - 1] + v[i][0] * dt
-        y[i] = y[i - 1] + v[i][1] * dt
-        theta[i] = theta[i - 1] + omega[i] * dt
+
+def waypoint_event(x_target, y_target, radius):
+    """
+    Returns an event for simulate_auv2_motion that ends the simulation once the AUV is within radius of a waypoint
+
+    x_target: x-position of the waypoint in m
+    y_target: y-position of the waypoint in m
+    radius: distance from the waypoint at which it counts as reached in m
+    """
+
+    if radius <= 0:
+        raise ValueError("The waypoint radius must be a positive quantity")
+
+    def event(t, x, y, theta, v, omega):
+        return np.hypot(x - x_target, y - y_target) <= radius
+
+    return event
+
+
+def bounding_box_event(x_min, x_max, y_min, y_max):
+    """
+    Returns an event for simulate_auv2_motion that ends the simulation once the AUV leaves a bounding box
+
+    x_min, x_max: bounds of the box on the x-axis in m
+    y_min, y_max: bounds of the box on the y-axis in m
+    """
+
+    if x_min >= x_max or y_min >= y_max:
+        raise ValueError("The lower bounds of the box must be below its upper bounds")
+
+    def event(t, x, y, theta, v, omega):
+        return (x < x_min) | (x > x_max) | (y < y_min) | (y > y_max)
+
+    return event
+
+
+def pressure_limit_event(max_pressure, depth_axis="y"):
+    """
+    Returns an event for simulate_auv2_motion that ends the simulation once calculate_pressure reports more than the hull can withstand at the AUV's depth
+
+    max_pressure: largest pressure the hull can withstand in Pa
+    depth_axis(optional): "x" or "y", the axis of the simulation plane that measures depth in m
+    """
+
+    if max_pressure <= atmospheric_pressure or depth_axis not in ("x", "y"):
+        raise ValueError(
+            "The pressure limit must exceed atmospheric pressure, and the depth axis must be x or y"
+        )
+
+    def event(t, x, y, theta, v, omega):
+        depth = x if depth_axis == "x" else y
+        return calculate_pressure_array(depth) > max_pressure
+
+    return event
+
+
+def _auv2_prefix_scan(body, a_angular, mass, dt, n, previous, initial=False):
+    """
+    Builds n rows of the same trajectory as the stepped simulate_auv2_motion loop without iterating in Python; because the thrust and thruster angle are constant the angular acceleration is too, so omega and theta are cumulative sums, and each remaining channel is a cumulative sum of increments that depend only on earlier channels
+
+    np.cumsum accumulates sequentially, so every channel adds the same terms in the same order as the loop
+
+    body: thrust resolved onto the x and y axes of the AUV in N, with shape (2,) or one row per step
+    a_angular: angular acceleration of the AUV in rad/s^2, scalar or one entry per step
+    previous: (x, y, theta, v, omega) of the row before the first one built, or of the first row itself when initial is set
+    """
+
+    x_prev, y_prev, theta_prev, v_prev, omega_prev = previous
+
+    def scan(increments, start):
+        if initial:
+            increments[:1] = start
+        else:
+            increments[:1] += start
+        return np.cumsum(increments, axis=0)
+
+    omega = scan(np.full(n, a_angular * dt), omega_prev)
+    theta = scan(omega * dt, theta_prev)
+
+    # Each acceleration is rotated by the heading at the end of the previous step
+    heading = np.empty(n)
+    heading[:1] = theta_prev
+    heading[1:] = theta[:-1]
+    cos_heading = np.cos(heading)
+    sin_heading = np.sin(heading)
+    a = np.empty((n, 2))
+    a[:, 0] = (cos_heading * body[..., 0] + -sin_heading * body[..., 1]) / mass
+    a[:, 1] = (sin_heading * body[..., 0] + cos_heading * body[..., 1]) / mass
+
+    v = scan(a * dt, v_prev)
+    x = scan(v[:, 0] * dt, x_prev)
+    y = scan(v[:, 1] * dt, y_prev)
+
+    return (x, y, theta, v, omega, a)
+
+
+def simulate_auv2_motion_chunks(
+    T,
+    alpha,
+    L,
+    l,
+    inertia=100,
+    mass=100,
+    dt=0.1,
+    t_final=10,
+    x0=0,
+    y0=0,
+    theta0=0,
+    chunk_size=4096,
+    geometry=None,
+):
+    """
+    Simulates the motion of the AUV in the 2-D plane like simulate_auv2_motion, but returns a generator yielding the trajectory in consecutive chunks of at most chunk_size steps, each a tuple of time, x and y positions, angular displacement, linear velocity, angular velocity, and linear acceleration arrays; memory use depends only on chunk_size, not on t_final
+
+    T: np.ndarray of the magnitude of forces applied to the thrusters in N
+    alpha: angle of the thruster relative to the x-axis in rad
+    L: distance from the center of mass of the AUV to the thrusters on the major axis of the AUV in m
+    l: distance from the center of mass of the AUV to the thrusters on the minor axis of the AUV in m
+    inertia(optional): rotational inertia of the AUV, measured in kg*m^2
+    mass(optional): mass of the AUV in kg
+    dt(optional): time step of the simulation in s
+    t_final(optional): final time of the simulation in s
+    x0(optional): initial x-position of the AUV in m
+    y0(optional): initial y-position of the AUV in m
+    theta0(optional): the initial angle of the AUV in rad
+    chunk_size(optional): number of steps in each yielded chunk
+    geometry(optional): precomputed ThrusterGeometry for (alpha, L, l)
+    """
+
+    geometry = _check_auv2_motion_inputs(
+        T, alpha, L, l, inertia, mass, dt, t_final, geometry
+    )
+    if chunk_size <= 0:
+        raise ValueError("The chunk size must be a positive quantity")
+
+    return _generate_auv2_motion_chunks(
+        np.dot(geometry.allocation, T),
+        np.dot(geometry.rotation.T, T) * geometry.sin_gamma / inertia,
+        mass,
+        dt,
+        max(int(np.ceil(t_final / dt)), 0),
+        (x0, y0, theta0, np.zeros(2), 0.0),
+        chunk_size,
+    )
+
+
+def _generate_auv2_motion_chunks(
+    body, a_angular, mass, dt, steps, initial, chunk_size, first_step=0
+):
+    previous = initial
+    for start in range(0, steps, chunk_size):
+        stop = min(start + chunk_size, steps)
+        x, y, theta, v, omega, a = _auv2_prefix_scan(
+            body if np.ndim(body) == 1 else body[start:stop],
+            a_angular if np.ndim(a_angular) == 0 else a_angular[start:stop],
+            mass,
+            dt,
+            stop - start,
+            previous,
+            initial=start == 0,
+        )
+        previous = (x[-1], y[-1], theta[-1], v[-1].copy(), omega[-1])
+        yield (
+            np.arange(first_step + start, first_step + stop) * dt,
+            x,
+            y,
+            theta,
+            v,
+            omega,
+            a,
+        )
+
+
+def prepare_auv2_batch(
+    T, alpha, L, l, inertia=100, mass=100, dt=0.1, t_final=10, x0=0, y0=0, theta0=0
+):
+    """
+    Validates the inputs of a multi-vehicle AUV2 simulation and sets up its state, for simulators that advance N AUVs together with step_auv2_batch, like simulate_auv2_motion_batch and swarm.simulate_swarm; returns the time array, the (N, 2) thrust resolved onto the x and y axes of each AUV, the angular acceleration of each AUV, the mass of each AUV, and the (N, 6) initial x, y, theta, vx, vy, omega state
+
+    T: np.ndarray of shape (N, 4) holding the forces applied by the four thrusters of each AUV in N
+    alpha: angle of the thrusters in rad, scalar or shape (N,)
+    L: distance from the center of mass of the AUV to the thrusters on the major axis of the AUV in m, scalar or shape (N,)
+    l: distance from the center of mass of the AUV to the thrusters on the minor axis of the AUV in m, scalar or shape (N,)
+    inertia(optional): rotational inertia of each AUV in kg*m^2, scalar or shape (N,)
+    mass(optional): mass of each AUV in kg, scalar or shape (N,)
+    dt(optional): time step of the simulation in s
+    t_final(optional): final time of the simulation in s
+    x0(optional): initial x-position of each AUV in m, scalar or shape (N,)
+    y0(optional): initial y-position of each AUV in m, scalar or shape (N,)
+    theta0(optional): initial angle of each AUV in rad, scalar or shape (N,)
+    """
+
+    if type(T) != np.ndarray:
+        raise TypeError("Input array must be a numpy array")
+    if T.ndim != 2 or T.shape[1] != 4:
+        raise ValueError("The forces array must have shape (N, 4)")
+
+    n = T.shape[0]
+    alpha, L, l, inertia, mass, x0, y0, theta0 = (
+        np.broadcast_to(np.asarray(p, dtype=float), (n,))
+        for p in (alpha, L, l, inertia, mass, x0, y0, theta0)
+    )
+    if (
+        np.any(inertia <= 0)
+        or np.any(mass <= 0)
+        or (np.any(L <= 0) or np.any(l <= 0))
+        or (dt < 0 or t_final < 0)
+    ):
+        raise ValueError(
+            "The mass and inertia of every AUV must be positive quantities, distances must be positive quantities, and time cannot be a negative quantity"
+        )
+
+    # Thrust resolved into the body frame of each AUV; constant over the run
+    body, a_angular = _auv2_forcing(T, alpha, L, l, inertia, None)
+    state = np.zeros((n, 6))
+    state[:, 0] = x0
+    state[:, 1] = y0
+    state[:, 2] = theta0
+    return (np.arange(0, t_final, dt), body, a_angular, mass, state)
+
+
+def step_auv2_batch(state, body, a_angular, mass, dt):
+    """
+    Advances the (N, 6) x, y, theta, vx, vy, omega state of every AUV by one semi-implicit Euler step in place, and returns the (N, 2) linear acceleration of the step
+
+    state: (N, 6) state array returned by prepare_auv2_batch
+    body: (N, 2) thrust of each AUV resolved onto its x and y axes, as returned by prepare_auv2_batch
+    a_angular: angular acceleration of each AUV in rad/s^2, as returned by prepare_auv2_batch
+    mass: mass of each AUV in kg, as returned by prepare_auv2_batch
+    dt: time step of the simulation in s
+    """
+
+    a = _auv2_heading_acceleration(state[:, 2], body.T, mass).T
+    state[:, 5] += a_angular * dt
+    state[:, 3:5] += a * dt
+    state[:, 0:2] += state[:, 3:5] * dt
+    state[:, 2] += state[:, 5] * dt
+    return a
+
+
+def simulate_auv2_motion_batch(
+    T, alpha, L, l, inertia=100, mass=100, dt=0.1, t_final=10, x0=0, y0=0, theta0=0
+):
+    """
+    Simulates the motion of N AUVs in the 2-D plane at once, advancing every vehicle together with vectorized steps; returns the time array followed by (N, steps) arrays of x and y positions, angular displacement, and angular velocity, and (N, steps, 2) arrays of linear velocity and linear acceleration
+
+    T: np.ndarray of shape (N, 4) holding the forces applied by the four thrusters of each AUV in N
+    alpha: angle of the thrusters in rad, either a scalar shared by every AUV or an array of shape (N,)
+    L: distance from the center of mass of the AUV to the thrusters on the major axis of the AUV in m, scalar or shape (N,)
+    l: distance from the center of mass of the AUV to the thrusters on the minor axis of the AUV in m, scalar or shape (N,)
+    inertia(optional): rotational inertia of each AUV in kg*m^2, scalar or shape (N,)
+    mass(optional): mass of each AUV in kg, scalar or shape (N,)
+    dt(optional): time step of the simulation in s
+    t_final(optional): final time of the simulation in s
+    x0(optional): initial x-position of each AUV in m, scalar or shape (N,)
+    y0(optional): initial y-position of each AUV in m, scalar or shape (N,)
+    theta0(optional): initial angle of each AUV in rad, scalar or shape (N,)
+    """
+
+    t, body, a_angular, mass, state = prepare_auv2_batch(
+        T, alpha, L, l, inertia, mass, dt, t_final, x0, y0, theta0
+    )
+    n = len(state)
+    steps = len(t)
+    x = np.zeros((n, steps))
+    y = np.zeros((n, steps))
+    theta = np.zeros((n, steps))
+    v = np.zeros((n, steps, 2))
+    omega = np.zeros((n, steps))
+    a = np.zeros((n, steps, 2))
+
+    if steps == 0:
+        return (t, x, y, theta, v, omega, a)
+
+    x[:, 0] = state[:, 0]
+    y[:, 0] = state[:, 1]
+    theta[:, 0] = state[:, 2]
+    a[:, 0] = _auv2_heading_acceleration(state[:, 2], body.T, mass).T
+
+    for i in range(1, steps):
+        a[:, i] = step_auv2_batch(state, body, a_angular, mass, dt)
+        x[:, i] = state[:, 0]
+        y[:, i] = state[:, 1]
+        theta[:, i] = state[:, 2]
+        v[:, i] = state[:, 3:5]
+        omega[:, i] = state[:, 5]
 
     return (t, x, y, theta, v, omega, a)
 
 
+def simulate_auv2_monte_carlo(
+    T,
+    alpha,
+    L,
+    l,
+    inertia=100,
+    mass=100,
+    dt=0.1,
+    t_final=10,
+    x0=0,
+    y0=0,
+    theta0=0,
+    samples=1000,
+    thrust_std=0.0,
+    alpha_std=0.0,
+    mass_std=0.0,
+    inertia_std=0.0,
+    seed=None,
+    percentiles=(5, 50, 95),
+    batch_size=1024,
+    reservoir_size=1000,
+):
+    """
+    Propagates uncertainty in the thrust, thruster angle, mass, and inertia of an AUV through its motion by simulating an ensemble of perturbed AUVs; returns a dict holding the time array, the number of samples, and the mean (steps, 3), covariance (steps, 3, 3), and percentiles (len(percentiles), steps, 3) of x, y, and theta over time
+
+    The ensemble is advanced in batches of batch_size AUVs with simulate_auv2_motion_batch and every batch is merged into running means and co-moments with Welford updates, so at most batch_size trajectories are held at once. Percentiles are taken over a uniform random reservoir of reservoir_size trajectories, which makes them exact whenever samples <= reservoir_size
+
+    T: np.ndarray of shape (4,) holding the nominal forces applied by the four thrusters in N
+    alpha: nominal angle of the thrusters in rad
+    L: distance from the center of mass of the AUV to the thrusters on the major axis of the AUV in m
+    l: distance from the center of mass of the AUV to the thrusters on the minor axis of the AUV in m
+    inertia(optional): nominal rotational inertia of the AUV in kg*m^2
+    mass(optional): nominal mass of the AUV in kg
+    dt(optional): time step of the simulation in s
+    t_final(optional): final time of the simulation in s
+    x0(optional): initial x-position of the AUV in m
+    y0(optional): initial y-position of the AUV in m
+    theta0(optional): initial angle of the AUV in rad
+    samples(optional): number of perturbed AUVs to simulate
+    thrust_std(optional): standard deviation of the normal perturbation of each thruster force in N, scalar or shape (4,)
+    alpha_std(optional): standard deviation of the normal perturbation of the thruster angle in rad
+    mass_std(optional): standard deviation of the normal perturbation of the mass in kg; perturbations are not truncated, so a ValueError is raised before any simulation when a drawn mass is not positive
+    inertia_std(optional): standard deviation of the normal perturbation of the inertia in kg*m^2, checked like mass_std
+    seed(optional): seed of the random generator the perturbations and reservoir are drawn from
+    percentiles(optional): percentiles of x, y, and theta to report, between 0 and 100
+    batch_size(optional): number of AUVs advanced together in one vectorized batch
+    reservoir_size(optional): number of trajectories kept for the percentiles
+    """
+
+    if type(T) != np.ndarray:
+        raise TypeError("Input array must be a numpy array")
+    if T.shape != (4,):
+        raise ValueError("The forces array must have shape (4,)")
+    thrust_std = np.broadcast_to(np.asarray(thrust_std, dtype=float), (4,))
+    if (
+        samples < 1
+        or batch_size < 1
+        or reservoir_size < 1
+        or np.any(thrust_std < 0)
+        or min(alpha_std, mass_std, inertia_std) < 0
+    ):
+        raise ValueError(
+            "The number of samples, batch size, and reservoir size must be positive, and standard deviations cannot be negative quantities"
+        )
+    q = np.asarray(percentiles, dtype=float)
+    if np.any((q < 0) | (q > 100)):
+        raise ValueError("Percentiles must lie between 0 and 100")
+
+    # Every perturbation is drawn up front, so the ensemble does not depend on batch_size
+    rng = np.random.default_rng(seed)
+    thrusts = T + rng.normal(0.0, thrust_std, (samples, 4))
+    alphas = alpha + rng.normal(0.0, alpha_std, samples)
+    inertias = inertia + rng.normal(0.0, inertia_std, samples)
+    masses = mass + rng.normal(0.0, mass_std, samples)
+    # Perturbations are not truncated, so fail before simulating rather than partway through
+    _check_array_inputs(
+        (masses <= 0) | (inertias <= 0),
+        "Perturbed masses and inertias must be positive; reduce mass_std or inertia_std relative to the nominal mass and inertia",
+    )
+    count = 0
+    mean = None
+    comoment = None
+    reservoir = None
+
+    for start in range(0, samples, batch_size):
+        n = min(batch_size, samples - start)
+        batch = slice(start, start + n)
+        t, x, y, theta, _, _, _ = simulate_auv2_motion_batch(
+            thrusts[batch],
+            alphas[batch],
+            L,
+            l,
+            inertias[batch],
+            masses[batch],
+            dt,
+            t_final,
+            x0,
+            y0,
+            theta0,
+        )
+        # (n, steps, 3) block of the positions and heading of the batch
+        batch = np.stack((x, y, theta), axis=-1)
+        if mean is None:
+            steps = len(t)
+            mean = np.zeros((steps, 3))
+            comoment = np.zeros((steps, 3, 3))
+            reservoir = np.empty((min(reservoir_size, samples), steps, 3))
+
+        # Welford update generalized to merging a whole batch at once (Chan et al.)
+        batch_mean = batch.mean(axis=0)
+        centered = batch - batch_mean
+        delta = batch_mean - mean
+        total = count + n
+        mean += delta * (n / total)
+        comoment += np.einsum("nsi,nsj->sij", centered, centered)
+        comoment += np.einsum("si,sj->sij", delta, delta) * (count * n / total)
+
+        # Reservoir sampling (Algorithm R): sample k replaces a random slot with probability reservoir_size / (k + 1),
+        # with the slots of the whole batch drawn at once
+        index = count + np.arange(n)
+        slots = rng.integers(0, index + 1)
+        slots = np.where(index < len(reservoir), index, slots)
+        kept = np.flatnonzero(slots < len(reservoir))
+        # When several samples land in one slot, the last of them is the one Algorithm R keeps
+        _, last = np.unique(slots[kept][::-1], return_index=True)
+        kept = kept[len(kept) - 1 - last]
+        reservoir[slots[kept]] = batch[kept]
+        count = total
+
+    covariance = comoment / (count - 1) if count > 1 else np.zeros_like(comoment)
+    return {
+        "t": t,
+        "samples": count,
+        "mean": mean,
+        "covariance": covariance,
+        "percentiles": np.percentile(reservoir, q, axis=0),
+    }
+
+
 # Exercise 9 Debugging
 
 
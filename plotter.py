@@ -0,0 +1,182 @@
+import numpy as np
+
+from trajectory_store import TrajectoryStore
+
+# Channels drawn against time, in the order of the time series axes
+PLOTTED_CHANNELS = ("x", "y", "theta")
+_LABELS = {"x": "X Position(m)", "y": "Y Position(m)", "theta": "Theta (rad)"}
+
+# Number of rows read from a memory-mapped trajectory at once
+_BLOCK_SIZE = 1 << 16
+
+
+class MinMaxDecimator:
+    """
+    Streaming min/max decimation of an AUV2 trajectory: the time range is split into equal buckets, roughly one per pixel column, and only the samples holding the smallest and largest x, y, and theta of each bucket are kept, so every peak survives and memory depends only on the number of buckets
+
+    t_start: time of the first sample in s
+    t_end: time of the last sample in s
+    buckets: number of time buckets
+    """
+
+    def __init__(self, t_start: float, t_end: float, buckets: int):
+        if buckets < 1:
+            raise ValueError("The number of buckets must be a positive quantity")
+        if t_end < t_start:
+            raise ValueError("The time range must not end before it starts")
+        self.t_start = t_start
+        self.t_end = t_end
+        self.buckets = buckets
+        # Rows of (t, x, y, theta) at the minimum and maximum of each channel in each bucket
+        self.extremes = np.full((len(PLOTTED_CHANNELS), buckets, 2, 4), np.nan)
+
+    def add(self, t, x, y, theta):
+        """
+        Folds one chunk of samples into the buckets; chunks may arrive in any order and split buckets anywhere
+        """
+
+        rows = np.stack(
+            [np.asarray(channel, dtype=float) for channel in (t, x, y, theta)], axis=-1
+        )
+        if len(rows) == 0:
+            return
+        rows[:, 3] = np.mod(rows[:, 3], 2 * np.pi)
+        span = self.t_end - self.t_start
+        scale = self.buckets / span if span > 0 else 0.0
+        bucket = np.clip(
+            ((rows[:, 0] - self.t_start) * scale).astype(int), 0, self.buckets - 1
+        )
+
+        for c in range(len(PLOTTED_CHANNELS)):
+            column = c + 1
+            # Sorting by bucket, then value, puts each bucket's minimum first and maximum last
+            order = np.lexsort((rows[:, column], bucket))
+            ordered = bucket[order]
+            starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+            ends = np.r_[starts[1:], len(order)] - 1
+            used = ordered[starts]
+            for side, (index, better) in enumerate(
+                ((order[starts], np.less), (order[ends], np.greater))
+            ):
+                candidate = rows[index]
+                current = self.extremes[c, used, side]
+                replace = np.isnan(current[:, column]) | better(
+                    candidate[:, column], current[:, column]
+                )
+                self.extremes[c, used[replace], side] = candidate[replace]
+
+    def samples(self, channel: str = None):
+        """
+        Returns the kept samples as arrays of (t, x, y, theta) in time order, either those kept for one channel or, when channel is omitted, those of every channel
+
+        channel(optional): one of "x", "y", and "theta"
+        """
+
+        if channel is None:
+            rows = self.extremes.reshape(-1, 4)
+        else:
+            rows = self.extremes[PLOTTED_CHANNELS.index(channel)].reshape(-1, 4)
+        rows = rows[~np.isnan(rows[:, 0])]
+        rows = rows[np.argsort(rows[:, 0], kind="stable")]
+        return tuple(rows.T)
+
+
+def _blocks(trajectory):
+    t, x, y, theta = trajectory[:4]
+    for start in range(0, len(t), _BLOCK_SIZE):
+        stop = start + _BLOCK_SIZE
+        yield (t[start:stop], x[start:stop], y[start:stop], theta[start:stop])
+
+
+def decimate_trajectory(source, buckets=1000, t_range=None):
+    """
+    Decimates an AUV2 trajectory to at most two samples per bucket and channel without loading it into memory at once; returns the MinMaxDecimator holding the kept samples
+
+    source: TrajectoryStore, (t, x, y, theta, v, omega, a) tuple as returned by simulate_auv2_motion, or iterable of such chunks as returned by simulate_auv2_motion_chunks
+    buckets(optional): number of time buckets, usually the pixel width of the plot
+    t_range(optional): (t_start, t_end) of the trajectory, required when source is an iterable of chunks
+    """
+
+    if isinstance(source, TrajectoryStore):
+        source = source.read()
+    if isinstance(source, tuple):
+        t = source[0]
+        if t_range is None:
+            t_range = (t[0], t[-1]) if len(t) else (0.0, 0.0)
+        chunks = _blocks(source)
+    else:
+        if t_range is None:
+            raise ValueError("t_range is required to decimate a stream of chunks")
+        chunks = (chunk[:4] for chunk in source)
+
+    decimator = MinMaxDecimator(float(t_range[0]), float(t_range[1]), buckets)
+    for chunk in chunks:
+        decimator.add(*chunk)
+    return decimator
+
+
+class TrajectoryPlot:
+    """
+    Figure with the x position, y position, and heading of an AUV2 over time and its path in the plane; the figure, axes, and lines are created once and only their data is replaced by later calls to plot, so redrawing costs depend on the pixel width of the axes rather than the length of the trajectory
+
+    figsize(optional): size of the figure in inches
+    """
+
+    def __init__(self, figsize=(10, 8)):
+        # matplotlib is only needed for drawing, not for decimating
+        import matplotlib.pyplot as plt
+
+        self.figure, axes = plt.subplots(2, 2, figsize=figsize)
+        self.axes = dict(zip((*PLOTTED_CHANNELS, "path"), axes.flat))
+        self.lines = {}
+        for name, ax in self.axes.items():
+            (self.lines[name],) = ax.plot([], [])
+            if name == "path":
+                ax.set_xlabel("X position(m)")
+                ax.set_ylabel("Y position(m)")
+            else:
+                ax.set_xlabel("Time(s)")
+                ax.set_ylabel(_LABELS[name])
+        self.figure.tight_layout()
+
+    def buckets(self) -> int:
+        """
+        Returns the pixel width of the narrowest axes, the number of buckets worth keeping
+        """
+
+        return max(int(min(ax.bbox.width for ax in self.axes.values())), 1)
+
+    def plot(self, source, t_range=None):
+        """
+        Draws a trajectory, replacing the previous one, and returns the figure
+
+        source: TrajectoryStore, trajectory tuple, or iterable of chunks, as accepted by decimate_trajectory
+        t_range(optional): (t_start, t_end) of the trajectory, required when source is an iterable of chunks
+        """
+
+        decimator = decimate_trajectory(source, self.buckets(), t_range)
+        for c, channel in enumerate(PLOTTED_CHANNELS):
+            samples = decimator.samples(channel)
+            self.lines[channel].set_data(samples[0], samples[c + 1])
+        t, x, y, theta = decimator.samples()
+        self.lines["path"].set_data(x, y)
+        for ax in self.axes.values():
+            ax.relim()
+            ax.autoscale_view()
+        self.figure.canvas.draw_idle()
+        return self.figure
+
+
+def plot_auv2_motion(source, t_range=None, plot=None):
+    """
+    Plots an AUV2 trajectory from memory, a memory-mapped store, or a stream of chunks, returning the TrajectoryPlot it was drawn in
+
+    source: TrajectoryStore, trajectory tuple, or iterable of chunks, as accepted by decimate_trajectory
+    t_range(optional): (t_start, t_end) of the trajectory, required when source is an iterable of chunks
+    plot(optional): TrajectoryPlot to reuse, a new one is created when omitted
+    """
+
+    if plot is None:
+        plot = TrajectoryPlot()
+    plot.plot(source, t_range)
+    return plot
@@ -0,0 +1,224 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from functools import lru_cache
+
+import numpy as np
+
+import physics
+from trajectory_store import HEADER_FILE, TrajectoryStore, save_trajectory
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, where eviction is left unlocked
+    fcntl = None
+
+LOCK_FILE = ".lock"
+# Prefix of the entries being written or removed, which readers never see
+_TEMPORARY_PREFIX = ".tmp-"
+# Age in s after which a temporary entry is assumed to be left by a crashed writer
+_STALE_AGE = 3600
+
+
+@lru_cache(maxsize=None)
+def code_version() -> str:
+    """
+    Returns a hash of the physics source, so cached results are recomputed whenever the simulator changes
+    """
+
+    with open(physics.__file__, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def parameter_key(
+    T, alpha, L, l, inertia=100, mass=100, dt=0.1, t_final=10, x0=0, y0=0, theta0=0
+) -> str:
+    """
+    Returns a stable content hash of the parameters of simulate_auv2_motion and the code version; equal parameters give the same key in every process, regardless of whether they are passed as ints, floats, or arrays
+    """
+
+    parameters = {
+        "T": np.asarray(T, dtype=float).tolist(),
+        **{
+            name: float(value)
+            for name, value in zip(
+                ("alpha", "L", "l", "inertia", "mass", "dt", "t_final", "x0", "y0"),
+                (alpha, L, l, inertia, mass, dt, t_final, x0, y0),
+            )
+        },
+        "theta0": float(theta0),
+        "code_version": code_version(),
+    }
+    # repr of a float round-trips exactly, so json.dumps is a canonical encoding
+    canonical = json.dumps(parameters, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _entry_size(path):
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+class ResultCache:
+    """
+    Content-addressed on-disk cache of simulate_auv2_motion results: each result is a TrajectoryStore named by parameter_key, so a hit is served as read-only memory maps instead of a new integration. Entries appear and disappear by atomic renames, so any number of processes can share the directory, and the least recently used entries are evicted once it grows past max_bytes
+
+    path: directory of the cache, created when missing
+    max_bytes(optional): size the cache is trimmed to after every insertion
+    """
+
+    def __init__(self, path: str, max_bytes: int = 1 << 30):
+        if max_bytes < 0:
+            raise ValueError("The cache size cannot be a negative quantity")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        """
+        Returns the cached (t, x, y, theta, v, omega, a) memory maps for key, or None when key is not cached
+        """
+
+        entry = os.path.join(self.path, key)
+        try:
+            store = TrajectoryStore(entry)
+            trajectory = store.read()
+            # The modification time of the header records the last use of the entry
+            os.utime(os.path.join(entry, HEADER_FILE))
+        except FileNotFoundError:
+            # Never cached, or evicted by another process while being read
+            return None
+        return trajectory
+
+    def put(self, key: str, trajectory, parameters: dict = None):
+        """
+        Stores a trajectory under key, keeping the existing entry when another process stored it first, then evicts old entries; returns the cached memory maps
+        """
+
+        temporary = os.path.join(self.path, f"{_TEMPORARY_PREFIX}{uuid.uuid4().hex}")
+        save_trajectory(temporary, trajectory, parameters)
+        try:
+            os.rename(temporary, os.path.join(self.path, key))
+        except OSError:
+            # Another process renamed its copy into place first
+            shutil.rmtree(temporary, ignore_errors=True)
+        self.evict()
+        cached = self.get(key)
+        # An entry larger than the whole cache is evicted at once and only returned
+        return cached if cached is not None else trajectory
+
+    def simulate(
+        self,
+        T,
+        alpha,
+        L,
+        l,
+        inertia=100,
+        mass=100,
+        dt=0.1,
+        t_final=10,
+        x0=0,
+        y0=0,
+        theta0=0,
+    ):
+        """
+        Returns the result of simulate_auv2_motion for the given parameters, from the cache when it holds them and otherwise by simulating and caching the result
+        """
+
+        parameters = dict(
+            T=np.asarray(T, dtype=float),
+            alpha=alpha,
+            L=L,
+            l=l,
+            inertia=inertia,
+            mass=mass,
+            dt=dt,
+            t_final=t_final,
+            x0=x0,
+            y0=y0,
+            theta0=theta0,
+        )
+        key = parameter_key(**parameters)
+        trajectory = self.get(key)
+        if trajectory is not None:
+            self.hits += 1
+            return trajectory
+        self.misses += 1
+        trajectory = physics.simulate_auv2_motion(**parameters)
+        return self.put(key, trajectory, parameters)
+
+    def entries(self):
+        """
+        Returns a list of (key, size in bytes, last use time) of every cached entry, least recently used first
+        """
+
+        entries = []
+        for entry in os.scandir(self.path):
+            if not entry.is_dir() or entry.name.startswith(_TEMPORARY_PREFIX):
+                continue
+            try:
+                used = os.stat(os.path.join(entry.path, HEADER_FILE)).st_mtime
+                entries.append((entry.name, _entry_size(entry.path), used))
+            except FileNotFoundError:
+                continue
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    @contextmanager
+    def _lock(self):
+        with open(os.path.join(self.path, LOCK_FILE), "a") as file:
+            if fcntl is not None:
+                fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(file, fcntl.LOCK_UN)
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache fits in max_bytes; memory maps already handed out stay readable
+        """
+
+        with self._lock():
+            now = time.time()
+            for entry in os.scandir(self.path):
+                if (
+                    entry.name.startswith(_TEMPORARY_PREFIX)
+                    and now - entry.stat().st_mtime > _STALE_AGE
+                ):
+                    shutil.rmtree(entry.path, ignore_errors=True)
+
+            entries = self.entries()
+            total = sum(size for _, size, _ in entries)
+            for key, size, _ in entries:
+                if total <= self.max_bytes:
+                    break
+                # Renaming first makes the entry vanish at once for concurrent readers
+                doomed = os.path.join(
+                    self.path, f"{_TEMPORARY_PREFIX}{uuid.uuid4().hex}"
+                )
+                try:
+                    os.rename(os.path.join(self.path, key), doomed)
+                except FileNotFoundError:
+                    continue
+                shutil.rmtree(doomed, ignore_errors=True)
+                total -= size
+
+    def clear(self):
+        """
+        Removes every cached entry
+        """
+
+        max_bytes, self.max_bytes = self.max_bytes, 0
+        try:
+            self.evict()
+        finally:
+            self.max_bytes = max_bytes
@@ -0,0 +1,267 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from physics import simulate_auv2_motion_batch
+
+# Parameters of one simulation request, in the order of simulate_auv2_motion
+REQUEST_PARAMETERS = (
+    "T",
+    "alpha",
+    "L",
+    "l",
+    "inertia",
+    "mass",
+    "dt",
+    "t_final",
+    "x0",
+    "y0",
+    "theta0",
+)
+_DEFAULTS = {
+    "inertia": 100,
+    "mass": 100,
+    "dt": 0.1,
+    "t_final": 10,
+    "x0": 0,
+    "y0": 0,
+    "theta0": 0,
+}
+# Per-AUV parameters of simulate_auv2_motion_batch; dt and t_final are shared by a batch
+_BATCHED_PARAMETERS = ("alpha", "L", "l", "inertia", "mass", "x0", "y0", "theta0")
+
+
+def _request_key(T, alpha, L, l, inertia, mass, dt, t_final, x0, y0, theta0):
+    T = np.asarray(T, dtype=float)
+    if T.shape != (4,):
+        raise ValueError("The forces array must have an entry for each thruster")
+    key = (tuple(T.tolist()),) + tuple(
+        float(p) for p in (alpha, L, l, inertia, mass, dt, t_final, x0, y0, theta0)
+    )
+    _, alpha, L, l, inertia, mass, dt, t_final = key[:8]
+    if (inertia <= 0 or mass <= 0) or (L <= 0 or l <= 0) or (dt <= 0 or t_final < 0):
+        raise ValueError(
+            "The mass and inertia of the object must be a positive quantity, distances and the time step must be positive quantities, and time cannot be a negative quantity"
+        )
+    return key
+
+
+def _split_batch(result):
+    """
+    Splits the output of simulate_auv2_motion_batch into read-only per-AUV trajectories shaped like the output of simulate_auv2_motion
+    """
+
+    t, *channels = result
+    t.flags.writeable = False
+    trajectories = []
+    for k in range(len(channels[0])):
+        trajectory = [t]
+        for channel in channels:
+            array = channel[k]
+            array.flags.writeable = False
+            trajectory.append(array)
+        trajectories.append(tuple(trajectory))
+    return trajectories
+
+
+class SimulationService:
+    """
+    Asyncio front-end to the AUV2 simulator shared by concurrent callers: identical requests that are queued or running together are coalesced into one simulation, and distinct requests arriving within batch_delay of each other are micro-batched into one vectorized simulate_auv2_motion_batch run on a worker pool, so the event loop never blocks on a simulation
+
+    Trajectories are shared between the callers of coalesced requests, so they are returned read-only
+
+    max_batch(optional): largest number of distinct requests simulated in one run
+    batch_delay(optional): time in s a request waits for others to batch with
+    executor(optional): concurrent.futures executor the simulations run on, e.g. a ProcessPoolExecutor; a thread pool owned by the service is used when omitted
+    """
+
+    def __init__(self, max_batch=64, batch_delay=0.005, executor=None):
+        if max_batch < 1 or batch_delay < 0:
+            raise ValueError(
+                "The batch size must be positive and the batch delay cannot be a negative quantity"
+            )
+        self.max_batch = max_batch
+        self.batch_delay = batch_delay
+        self._owns_executor = executor is None
+        self.executor = executor if executor is not None else ThreadPoolExecutor()
+        # Futures of the requests that are queued or running, keyed by their parameters
+        self._requests = {}
+        self._queue = []
+        self._flush_handle = None
+        self._tasks = set()
+        self.stats = {"requests": 0, "coalesced": 0, "batches": 0, "simulations": 0}
+
+    async def simulate(
+        self,
+        T,
+        alpha,
+        L,
+        l,
+        inertia=100,
+        mass=100,
+        dt=0.1,
+        t_final=10,
+        x0=0,
+        y0=0,
+        theta0=0,
+    ):
+        """
+        Simulates the motion of the AUV in the 2-D plane, returning the same (t, x, y, theta, v, omega, a) tuple as simulate_auv2_motion; takes the same parameters, with T as any sequence of four forces
+        """
+
+        key = _request_key(T, alpha, L, l, inertia, mass, dt, t_final, x0, y0, theta0)
+        self.stats["requests"] += 1
+        future = self._requests.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(future)
+
+        loop = asyncio.get_running_loop()
+        future = self._requests[key] = loop.create_future()
+        self._queue.append(key)
+        if len(self._queue) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_delay, self._flush)
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        queue, self._queue = self._queue, []
+
+        # Only requests on the same time grid can share a batched run
+        groups = {}
+        for key in queue:
+            groups.setdefault(key[6:8], []).append(key)
+        for (dt, t_final), keys in groups.items():
+            task = asyncio.get_running_loop().create_task(
+                self._run_batch(keys, dt, t_final)
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, keys, dt, t_final):
+        columns = list(zip(*keys))
+        batched = {
+            name: np.array(columns[REQUEST_PARAMETERS.index(name)])
+            for name in _BATCHED_PARAMETERS
+        }
+        self.stats["batches"] += 1
+        self.stats["simulations"] += len(keys)
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                self.executor,
+                simulate_auv2_motion_batch,
+                np.array(columns[0]),
+                batched["alpha"],
+                batched["L"],
+                batched["l"],
+                batched["inertia"],
+                batched["mass"],
+                dt,
+                t_final,
+                batched["x0"],
+                batched["y0"],
+                batched["theta0"],
+            )
+            outcomes = [(trajectory, None) for trajectory in _split_batch(result)]
+        except Exception as error:
+            outcomes = [(None, error)] * len(keys)
+
+        for key, (trajectory, error) in zip(keys, outcomes):
+            future = self._requests.pop(key)
+            if future.cancelled():
+                continue
+            if error is None:
+                future.set_result(trajectory)
+            else:
+                future.set_exception(error)
+
+    async def close(self):
+        """
+        Runs the queued requests to completion and shuts down the worker pool if the service owns it
+        """
+
+        if self._queue:
+            self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+        if self._owns_executor:
+            self.executor.shutdown()
+
+    async def start_server(self, host="127.0.0.1", port=0):
+        """
+        Serves the simulator over a minimal local HTTP endpoint and returns the asyncio server: POST /simulate with a JSON object of simulate_auv2_motion parameters answers with a JSON object of the trajectory channels
+
+        host(optional): address to listen on
+        port(optional): port to listen on, any free port when 0
+        """
+
+        return await asyncio.start_server(self._handle_http, host, port)
+
+    async def _simulate_http(self, reader, length):
+        # Requests are validated up front, so any failure of the simulation itself
+        # is a server error rather than a bad request
+        try:
+            body = await reader.readexactly(length)
+            parameters = {**_DEFAULTS, **json.loads(body)}
+            unknown = set(parameters) - set(REQUEST_PARAMETERS)
+            if unknown:
+                raise ValueError(f"Unknown parameters {sorted(unknown)}")
+            arguments = [parameters[name] for name in REQUEST_PARAMETERS]
+            _request_key(*arguments)
+        except (
+            KeyError,
+            TypeError,
+            ValueError,
+            asyncio.IncompleteReadError,
+        ) as error:
+            return "400 Bad Request", {"error": str(error)}
+
+        try:
+            trajectory = await self.simulate(*arguments)
+        except Exception as error:
+            return "500 Internal Server Error", {"error": f"Simulation failed: {error}"}
+        return "200 OK", dict(
+            zip(
+                ("t", "x", "y", "theta", "v", "omega", "a"),
+                (channel.tolist() for channel in trajectory),
+            )
+        )
+
+    async def _handle_http(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            try:
+                method, path, *_ = request_line.decode("latin1").split()
+                length = int(headers.get("content-length", 0))
+                if length < 0:
+                    raise ValueError
+            except ValueError:
+                status, response = "400 Bad Request", {"error": "Malformed request"}
+            else:
+                if (method, path) != ("POST", "/simulate"):
+                    status, response = "404 Not Found", {"error": "Not found"}
+                else:
+                    status, response = await self._simulate_http(reader, length)
+
+            payload = json.dumps(response).encode()
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\nContent-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode()
+                + payload
+            )
+            await writer.drain()
+        finally:
+            writer.close()
@@ -0,0 +1,156 @@
+import numpy as np
+
+from physics import prepare_auv2_batch, step_auv2_batch
+
+# Fields of each separation violation reported by simulate_swarm
+VIOLATION_DTYPE = np.dtype(
+    [
+        ("step", np.int64),
+        ("time", float),
+        ("i", np.int64),
+        ("j", np.int64),
+        ("distance", float),
+    ]
+)
+
+# Neighbouring grid cells searched from each cell; the other half of the
+# neighbourhood is covered when the neighbours search back, so each pair is found once
+_HALF_NEIGHBOURHOOD = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+
+
+def find_close_pairs(x, y, radius):
+    """
+    Finds every pair of points closer than radius with a uniform-grid spatial hash, comparing each point only with those in its own and neighbouring cells of side radius instead of with every other point; returns arrays i, j, and distance with i < j, sorted by i then j
+
+    x: np.ndarray of shape (N,) holding the x-positions in m
+    y: np.ndarray of shape (N,) holding the y-positions in m
+    radius: separation below which two points are reported, in m
+    """
+
+    if radius <= 0:
+        raise ValueError("The separation radius must be a positive quantity")
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0))
+    if len(x) < 2:
+        return empty
+
+    cx = np.floor(x / radius).astype(np.int64)
+    cy = np.floor(y / radius).astype(np.int64)
+    cx -= cx.min() - 1
+    cy -= cy.min() - 1
+    # Keys leave a margin of one cell on each side, so neighbour keys never wrap around
+    height = cy.max() + 2
+    key = cx * height + cy
+
+    order = np.argsort(key, kind="stable")
+    cells, starts, counts = np.unique(key[order], return_index=True, return_counts=True)
+    cell_of = np.repeat(np.arange(len(cells)), counts)
+
+    first, second = [], []
+    for dx, dy in _HALF_NEIGHBOURHOOD:
+        neighbour_key = cells + dx * height + dy
+        neighbour = np.minimum(np.searchsorted(cells, neighbour_key), len(cells) - 1)
+        present = cells[neighbour] == neighbour_key
+        # Every point of a cell is paired with every point of the neighbouring cell
+        partners = np.where(present, counts[neighbour], 0)[cell_of]
+        total = partners.sum()
+        if total == 0:
+            continue
+        a = np.repeat(np.arange(len(order)), partners)
+        ramp = np.arange(total) - np.repeat(np.cumsum(partners) - partners, partners)
+        b = starts[neighbour[cell_of[a]]] + ramp
+        if (dx, dy) == (0, 0):
+            keep = a < b
+            a, b = a[keep], b[keep]
+        first.append(order[a])
+        second.append(order[b])
+
+    if not first:
+        return empty
+    i = np.concatenate(first)
+    j = np.concatenate(second)
+    distance = np.hypot(x[i] - x[j], y[i] - y[j])
+    close = distance < radius
+    i, j, distance = i[close], j[close], distance[close]
+    i, j = np.minimum(i, j), np.maximum(i, j)
+    pairs = np.lexsort((j, i))
+    return i[pairs], j[pairs], distance[pairs]
+
+
+def simulate_swarm(
+    T,
+    alpha,
+    L,
+    l,
+    inertia=100,
+    mass=100,
+    dt=0.1,
+    t_final=10,
+    x0=0,
+    y0=0,
+    theta0=0,
+    separation=1.0,
+    stop_on_violation=False,
+):
+    """
+    Simulates a fleet of N AUVs in the 2-D plane, advancing every vehicle together in one (N, 6) state array with the same semi-implicit Euler steps as simulate_auv2_motion_batch and checking their separation after every step with find_close_pairs; returns the time array, (N, steps) arrays of x and y positions and angular displacement, and a structured array of VIOLATION_DTYPE events
+
+    A violation event is reported at the step where a pair of vehicles comes closer than separation, and again only after the pair has separated and closed in once more
+
+    T: np.ndarray of shape (N, 4) holding the forces applied by the four thrusters of each AUV in N
+    alpha: angle of the thrusters in rad, scalar or shape (N,)
+    L: distance from the center of mass of the AUV to the thrusters on the major axis of the AUV in m, scalar or shape (N,)
+    l: distance from the center of mass of the AUV to the thrusters on the minor axis of the AUV in m, scalar or shape (N,)
+    inertia(optional): rotational inertia of each AUV in kg*m^2, scalar or shape (N,)
+    mass(optional): mass of each AUV in kg, scalar or shape (N,)
+    dt(optional): time step of the simulation in s
+    t_final(optional): final time of the simulation in s
+    x0(optional): initial x-position of each AUV in m, scalar or shape (N,)
+    y0(optional): initial y-position of each AUV in m, scalar or shape (N,)
+    theta0(optional): initial angle of each AUV in rad, scalar or shape (N,)
+    separation(optional): smallest allowed distance between two AUVs in m
+    stop_on_violation(optional): end the simulation at the first step with a violation, truncating the returned arrays there
+    """
+
+    if separation <= 0:
+        raise ValueError("The separation must be a positive quantity")
+    t, body, a_angular, mass, state = prepare_auv2_batch(
+        T, alpha, L, l, inertia, mass, dt, t_final, x0, y0, theta0
+    )
+    n = len(state)
+    steps = len(t)
+    x = np.zeros((n, steps))
+    y = np.zeros((n, steps))
+    theta = np.zeros((n, steps))
+    events = []
+    # Pairs closer than separation at the previous step, encoded as i * n + j
+    previous = np.empty(0, dtype=np.int64)
+
+    for step in range(steps):
+        if step > 0:
+            step_auv2_batch(state, body, a_angular, mass, dt)
+        x[:, step] = state[:, 0]
+        y[:, step] = state[:, 1]
+        theta[:, step] = state[:, 2]
+
+        i, j, distance = find_close_pairs(state[:, 0], state[:, 1], separation)
+        current = i * n + j
+        onset = ~np.isin(current, previous, assume_unique=True)
+        previous = current
+        if np.any(onset):
+            found = np.empty(np.count_nonzero(onset), dtype=VIOLATION_DTYPE)
+            found["step"] = step
+            found["time"] = t[step]
+            found["i"] = i[onset]
+            found["j"] = j[onset]
+            found["distance"] = distance[onset]
+            events.append(found)
+            if stop_on_violation:
+                stop = step + 1
+                return (t[:stop], x[:, :stop], y[:, :stop], theta[:, :stop], found)
+
+    violations = (
+        np.concatenate(events) if events else np.empty(0, dtype=VIOLATION_DTYPE)
+    )
+    return (t, x, y, theta, violations)
@@ -0,0 +1,204 @@
+import argparse
+import csv
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from physics import simulate_auv2_motion_batch
+
+# Columns of the summary array returned by run_sweep
+SUMMARY_METRICS = (
+    "x_final",
+    "y_final",
+    "theta_final",
+    "speed_final",
+    "speed_max",
+    "path_length",
+)
+SWEEP_PARAMETERS = ("T", "alpha", "L", "l", "mass", "inertia")
+
+
+def build_parameter_grid(T, alpha, L, l, mass=(100,), inertia=(100,)):
+    """
+    Builds every combination of the given parameter values, returning a dict of stacked arrays with one entry per run: T with shape (runs, 4) and the rest with shape (runs,)
+
+    T: sequence of thrust vectors, each with the forces applied by the four thrusters in N
+    alpha: sequence of thruster angles in rad
+    L: sequence of distances from the center of mass to the thrusters on the major axis in m
+    l: sequence of distances from the center of mass to the thrusters on the minor axis in m
+    mass(optional): sequence of AUV masses in kg
+    inertia(optional): sequence of AUV rotational inertias in kg*m^2
+    """
+
+    T = np.asarray(T, dtype=float)
+    if T.ndim != 2 or T.shape[1] != 4:
+        raise ValueError("Each thrust vector must have an entry for each thruster")
+
+    axes = [range(len(T)), alpha, L, l, mass, inertia]
+    combinations = list(itertools.product(*axes))
+    if not combinations:
+        return {
+            "T": np.empty((0, 4)),
+            **{name: np.empty(0) for name in SWEEP_PARAMETERS[1:]},
+        }
+    columns = list(zip(*combinations))
+    grid = {"T": T[list(columns[0])]}
+    for name, column in zip(SWEEP_PARAMETERS[1:], columns[1:]):
+        grid[name] = np.asarray(column, dtype=float)
+    return grid
+
+
+def summarize_runs(x, y, theta, v):
+    """
+    Reduces batched trajectories from simulate_auv2_motion_batch to one row of SUMMARY_METRICS per run
+    """
+
+    speed = np.linalg.norm(v, axis=-1)
+    summary = np.empty((x.shape[0], len(SUMMARY_METRICS)))
+    if x.shape[1] == 0:
+        summary[:] = np.nan
+        return summary
+    summary[:, 0] = x[:, -1]
+    summary[:, 1] = y[:, -1]
+    summary[:, 2] = theta[:, -1]
+    summary[:, 3] = speed[:, -1]
+    summary[:, 4] = speed.max(axis=1)
+    summary[:, 5] = np.hypot(np.diff(x, axis=1), np.diff(y, axis=1)).sum(axis=1)
+    return summary
+
+
+def _run_sweep_chunk(shm_name, runs, start, parameters, dt, t_final):
+    """
+    Simulates one shard of the sweep as a single batch and writes its summary rows straight into the shared summary block
+    """
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        summary = np.ndarray((runs, len(SUMMARY_METRICS)), buffer=shm.buf)
+        t, x, y, theta, v, omega, a = simulate_auv2_motion_batch(
+            parameters["T"],
+            parameters["alpha"],
+            parameters["L"],
+            parameters["l"],
+            parameters["inertia"],
+            parameters["mass"],
+            dt,
+            t_final,
+        )
+        summary[start : start + len(x)] = summarize_runs(x, y, theta, v)
+        del summary
+    finally:
+        shm.close()
+    return start
+
+
+def run_sweep(grid, dt=0.1, t_final=10, workers=None, chunk_size=256):
+    """
+    Runs simulate_auv2_motion for every set of parameters in the grid, sharding the grid into batches of chunk_size runs across a process pool; workers write their summaries into shared memory, and the (runs, len(SUMMARY_METRICS)) summary array is returned
+
+    grid: dict of stacked parameter arrays, as returned by build_parameter_grid
+    dt(optional): time step of the simulation in s
+    t_final(optional): final time of the simulation in s
+    workers(optional): number of worker processes, defaults to the number of CPUs; 0 runs every shard in the calling process
+    chunk_size(optional): number of runs simulated together by each task
+    """
+
+    if chunk_size <= 0 or (workers is not None and workers < 0):
+        raise ValueError(
+            "The chunk size must be a positive quantity, and the number of workers cannot be negative"
+        )
+    runs = len(grid["T"])
+    if runs == 0:
+        return np.empty((0, len(SUMMARY_METRICS)))
+
+    shm = shared_memory.SharedMemory(
+        create=True, size=runs * len(SUMMARY_METRICS) * np.dtype(float).itemsize
+    )
+    try:
+        shards = [
+            (
+                shm.name,
+                runs,
+                start,
+                {
+                    name: grid[name][start : start + chunk_size]
+                    for name in SWEEP_PARAMETERS
+                },
+                dt,
+                t_final,
+            )
+            for start in range(0, runs, chunk_size)
+        ]
+        if workers == 0:
+            for shard in shards:
+                _run_sweep_chunk(*shard)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for future in [executor.submit(_run_sweep_chunk, *s) for s in shards]:
+                    future.result()
+        return np.ndarray((runs, len(SUMMARY_METRICS)), buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def write_summary(path, grid, summary):
+    """
+    Writes one CSV row per run with its parameters followed by its summary metrics
+    """
+
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(
+            ["T1", "T2", "T3", "T4", *SWEEP_PARAMETERS[1:], *SUMMARY_METRICS]
+        )
+        for i in range(len(summary)):
+            writer.writerow(
+                [
+                    *grid["T"][i],
+                    *(grid[name][i] for name in SWEEP_PARAMETERS[1:]),
+                    *summary[i],
+                ]
+            )
+
+
+def _float_list(text):
+    return [float(value) for value in text.split(",")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run a parameter sweep of simulate_auv2_motion across a process pool"
+    )
+    parser.add_argument(
+        "--T",
+        type=_float_list,
+        action="append",
+        required=True,
+        help="comma separated forces of the four thrusters in N; repeat for more values",
+    )
+    parser.add_argument("--alpha", type=float, nargs="+", required=True)
+    parser.add_argument("--L", type=float, nargs="+", required=True)
+    parser.add_argument("--l", type=float, nargs="+", required=True)
+    parser.add_argument("--mass", type=float, nargs="+", default=[100.0])
+    parser.add_argument("--inertia", type=float, nargs="+", default=[100.0])
+    parser.add_argument("--dt", type=float, default=0.1)
+    parser.add_argument("--t-final", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--output", default="sweep_summary.csv")
+    args = parser.parse_args(argv)
+
+    grid = build_parameter_grid(
+        args.T, args.alpha, args.L, args.l, args.mass, args.inertia
+    )
+    summary = run_sweep(grid, args.dt, args.t_final, args.workers, args.chunk_size)
+    write_summary(args.output, grid, summary)
+    print(f"Wrote {len(summary)} runs to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
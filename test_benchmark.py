@@ -0,0 +1,41 @@
+import unittest
+from benchmark import *
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_run_benchmark(self):
+        result = run_benchmark(lambda: [0.0] * 1000, 1000, repeat=2)
+
+        self.assertGreater(result["seconds"], 0)
+        self.assertAlmostEqual(result["steps_per_second"], 1000 / result["seconds"])
+        self.assertGreaterEqual(result["peak_memory_bytes"], 8000)
+
+    def test_run_import_benchmark(self):
+        result = run_import_benchmark("physics", repeat=1)
+
+        self.assertGreater(result["seconds"], 0)
+        self.assertGreater(result["peak_memory_bytes"], 0)
+        self.assertFalse(result["numpy_loaded"])
+        self.assertTrue(run_import_benchmark("sweep", repeat=1)["numpy_loaded"])
+
+    def test_find_regressions(self):
+        baseline = {
+            "fast": {"steps_per_second": 1000.0},
+            "slow": {"steps_per_second": 1000.0},
+        }
+        results = {
+            "fast": {"steps_per_second": 950.0},
+            "slow": {"steps_per_second": 700.0},
+            "new": {"steps_per_second": 1.0},
+        }
+
+        regressions = find_regressions(results, baseline, 0.1)
+        self.assertEqual(list(regressions), ["slow"])
+        self.assertAlmostEqual(regressions["slow"], 0.3)
+        self.assertEqual(find_regressions(results, baseline, 0.5), {})
+
+        self.assertRaises(ValueError, find_regressions, results, baseline, -0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+import instrumentation
+from instrumentation import *
+from physics import simulate_auv2_motion
+
+
+class TestInstrumentation(unittest.TestCase):
+    def test_profile_physics(self):
+        T = np.array([40.0, 60.0, 80.0, 100.0])
+
+        with profile_physics() as profiler:
+            self.assertIs(instrumentation.active_profiler, profiler)
+            simulate_auv2_motion(T, np.pi / 3, 3.0, 2.0, t_final=1.0)
+        self.assertIsNone(instrumentation.active_profiler)
+
+        summary = profiler.summary()
+        self.assertEqual(summary["simulate.validation"]["calls"], 1)
+        self.assertEqual(summary["simulate.state_update"]["calls"], 9)
+        self.assertEqual(summary["auv2_acceleration.trig"]["calls"], 10)
+        self.assertGreater(summary["auv2_acceleration.product"]["seconds"], 0)
+
+        with profile_physics(profiler):
+            simulate_auv2_motion(T, np.pi / 3, 3.0, 2.0, t_final=1.0, vectorized=True)
+        self.assertEqual(profiler.summary()["simulate.validation"]["calls"], 2)
+        self.assertIn("simulate.prefix_scan", profiler.summary())
+
+        # Nothing is recorded once the with block has exited
+        simulate_auv2_motion(T, np.pi / 3, 3.0, 2.0, t_final=1.0)
+        self.assertEqual(profiler.summary()["simulate.validation"]["calls"], 2)
+
+    def test_export(self):
+        profiler = PhaseProfiler()
+        with profiler.phase("setup"):
+            pass
+        profiler.stop("step", profiler.start())
+        profiler.stop("step", profiler.start())
+
+        self.assertEqual(json.loads(profiler.to_json())["step"]["calls"], 2)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "profile.csv")
+            profiler.to_csv(path)
+            with open(path) as file:
+                lines = file.read().splitlines()
+        self.assertEqual(lines[0], "phase,calls,seconds,allocated_blocks")
+        self.assertEqual([line.split(",")[0] for line in lines[1:]], ["setup", "step"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,14 @@
 import unittest
+import importlib.util
 import math
+import os
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from unittest import mock
 import numpy as np
+import physics
 from physics import *
 
 
@@ -37,6 +45,12 @@ class TestPhysics(unittest.TestCase):
     def test_calculate_torque(self):
         self.assertAlmostEqual(calculate_torque(20.0, 45.0, math.sqrt(2)), 20.0)
         self.assertAlmostEqual(calculate_torque(10.0, 30.0, 5.0), 25.0)
+        self.assertTrue(
+            np.allclose(calculate_torque(10.0, np.array([30.0, 90.0]), 5.0), [25, 50])
+        )
+        self.assertTrue(
+            np.allclose(calculate_torque(10.0, [30.0, 90.0], 5.0), [25, 50])
+        )
 
         self.assertRaises(ValueError, calculate_torque, 5.0, 60.0, -math.sqrt(3))
 
@@ -46,6 +60,183 @@ class TestPhysics(unittest.TestCase):
         self.assertRaises(ValueError, calculate_moment_of_inertia, 68.0, -9.0)
         self.assertRaises(ValueError, calculate_moment_of_inertia, -68.0, 9.0)
 
+    def test_lazy_numpy_import(self):
+        code = (
+            "import sys, physics; "
+            "physics.calculate_buoyancy(1000, 0.1); physics.calculate_pressure(-3); "
+            "physics.calculate_torque(10.0, 30.0, 5.0); "
+            "physics.calculate_moment_of_inertia(2.0, 6.0); "
+            "print('numpy' in sys.modules); "
+            "physics.calculate_pressure_array([1, 2]); "
+            "print('numpy' in sys.modules, physics.np is sys.modules['numpy'])"
+        )
+        completed = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        self.assertEqual(completed.stdout.split(), ["False", "True", "True"])
+
+        # A star import brings in the physics API but not the stand-in or internal modules
+        code = (
+            "from physics import *; "
+            "print(callable(simulate_auv2_motion), "
+            "any(name in globals() for name in ('np', 'os', 'struct', 'importlib', 'instrumentation')))"
+        )
+        completed = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        self.assertEqual(completed.stdout.split(), ["True", "False"])
+
+    def test_calculate_buoyancy_array(self):
+        density = np.array([1.0, 5.0, 1000.0])
+        volume = np.array([10.0, 20.0, 0.1])
+        out = np.empty(3)
+
+        result = calculate_buoyancy_array(density, volume, out=out)
+        self.assertIs(result, out)
+        self.assertTrue(np.allclose(out, [98.1, 981.0, 981.0]))
+        self.assertTrue(
+            np.allclose(calculate_buoyancy_array(1000, volume), 9810.0 * volume)
+        )
+
+        with self.assertRaises(InvalidInputError) as context:
+            calculate_buoyancy_array(np.array([1.0, -2.0, 3.0, 0.0]), 5.0)
+        self.assertEqual(context.exception.indices.tolist(), [[1], [3]])
+        self.assertIsInstance(context.exception, ValueError)
+
+    def test_will_it_float_array(self):
+        self.assertEqual(
+            will_it_float_array([0.42, 0.99], [48.2, 998.9]).tolist(), [True, False]
+        )
+
+        with self.assertRaises(InvalidInputError) as context:
+            will_it_float_array(np.array([[0.1, -0.19], [0.2, 0.3]]), 991.0)
+        self.assertEqual(context.exception.indices.tolist(), [[0, 1]])
+
+    def test_calculate_pressure_array(self):
+        out = np.empty(3)
+        calculate_pressure_array([-1, 2, -3], out=out)
+        self.assertTrue(np.allclose(out, [111135, 120945, 130755]))
+        self.assertAlmostEqual(calculate_pressure_array(-1), 111135)
+        self.assertAlmostEqual(calculate_moment_of_inertia_array(2, 3), 18)
+
+    def test_calculate_acceleration_array(self):
+        self.assertTrue(
+            np.allclose(
+                calculate_acceleration_array([102.0, 57.0], [51.0, 19.0]), [2, 3]
+            )
+        )
+        self.assertTrue(
+            np.allclose(
+                calculate_angular_acceleration_array([102.0, 57.0], [51.0, 19.0]),
+                [2, 3],
+            )
+        )
+
+        self.assertRaises(
+            InvalidInputError, calculate_acceleration_array, 68.0, [1.0, -9.0]
+        )
+        self.assertRaises(
+            InvalidInputError, calculate_angular_acceleration_array, 68.0, [-9.0]
+        )
+
+    def test_calculate_torque_array(self):
+        self.assertTrue(
+            np.allclose(
+                calculate_torque_array([20.0, 10.0], [45.0, 30.0], [math.sqrt(2), 5.0]),
+                [20.0, 25.0],
+            )
+        )
+        self.assertTrue(
+            np.allclose(calculate_torque_array(10.0, [30.0, 90.0], 5.0), [25.0, 50.0])
+        )
+
+        self.assertRaises(
+            InvalidInputError, calculate_torque_array, 5.0, 60.0, [1.0, -math.sqrt(3)]
+        )
+
+    def test_calculate_moment_of_inertia_array(self):
+        out = np.zeros((2, 2))
+        calculate_moment_of_inertia_array(np.array([[2.0], [1.0]]), [6.0, 0.0], out=out)
+        self.assertTrue(np.allclose(out, [[72.0, 0.0], [36.0, 0.0]]))
+        self.assertTrue(
+            np.allclose(
+                calculate_moment_of_inertia_array(np.array([[2.0], [1.0]]), [6.0, 0.0]),
+                [[72.0, 0.0], [36.0, 0.0]],
+            )
+        )
+
+        self.assertRaises(
+            InvalidInputError, calculate_moment_of_inertia_array, [68.0], [-9.0]
+        )
+        self.assertRaises(
+            InvalidInputError, calculate_moment_of_inertia_array, [-68.0], [9.0]
+        )
+
+    def test_simulate_vertical_motion(self):
+        density = np.array([500.0, 1000.0, 2000.0])
+        t, z, velocity, acceleration, pressure = simulate_vertical_motion(
+            density, 0.1, dt=0.01, t_final=2.0, z0=-5.0
+        )
+        self.assertEqual(z.shape, (3, len(t)))
+        self.assertTrue(np.allclose(pressure, calculate_pressure_array(z)))
+
+        # Reference explicit Euler loop for each object under a constant force
+        for k in range(3):
+            net = (calculate_buoyancy(density_water, 0.1) - density[k] * 0.1 * g) / (
+                density[k] * 0.1
+            )
+            z_ref = [-5.0]
+            v_ref = [0.0]
+            for _ in range(1, len(t)):
+                z_ref.append(z_ref[-1] + v_ref[-1] * 0.01)
+                v_ref.append(v_ref[-1] + net * 0.01)
+            self.assertTrue(np.allclose(z[k], z_ref))
+            self.assertTrue(np.allclose(velocity[k], v_ref))
+            self.assertTrue(np.allclose(acceleration[k], net))
+        self.assertTrue(np.all(velocity[1] == 0))
+        self.assertEqual(simulate_vertical_motion(500.0, 0.1)[1].shape, (1000,))
+
+        # Drag bounds every object at its terminal velocity
+        t, z, velocity, acceleration, pressure = simulate_vertical_motion(
+            density[:, np.newaxis],
+            np.array([0.01, 0.1]),
+            t_final=60.0,
+            drag_coefficient=0.47,
+        )
+        self.assertEqual(z.shape, (3, 2, len(t)))
+        volume = np.array([0.01, 0.1])
+        area = np.pi * (3 * volume / (4 * np.pi)) ** (2 / 3)
+        mass = density[:, np.newaxis] * volume
+        net = (density_water - density[:, np.newaxis]) * volume * g
+        terminal = np.sign(net) * np.sqrt(
+            np.abs(net) / (0.5 * density_water * 0.47 * area)
+        )
+        self.assertTrue(np.allclose(velocity[..., -1], terminal, atol=1e-6))
+        self.assertTrue(np.allclose(acceleration[..., -1], 0, atol=1e-6))
+
+        # A drag coefficient of zero in the stepped path matches the closed form
+        stepped = simulate_vertical_motion(
+            density, 0.1, t_final=2.0, drag_coefficient=np.array([0.0, 0.0, 1e-300])
+        )
+        closed = simulate_vertical_motion(density, 0.1, t_final=2.0)
+        for a, b in zip(stepped, closed):
+            self.assertTrue(np.allclose(a, b))
+
+        self.assertRaises(InvalidInputError, simulate_vertical_motion, -1.0, 0.1)
+        self.assertRaises(InvalidInputError, simulate_vertical_motion, 500.0, 0.0)
+        self.assertRaises(
+            InvalidInputError, simulate_vertical_motion, 500.0, 0.1, drag_coefficient=-1
+        )
+        self.assertRaises(ValueError, simulate_vertical_motion, 500.0, 0.1, dt=-0.1)
+
     def test_calculate_auv_acceleration(self):
         self.assertTrue(
             np.allclose(
@@ -140,6 +331,132 @@ class TestPhysics(unittest.TestCase):
             2.0,
         )
 
+    def test_thruster_geometry(self):
+        T = np.array([2.0, 4.0, 10.0, 6.0])
+        geometry = get_thruster_geometry(np.pi / 4, 2.0, 3.0)
+
+        self.assertIs(geometry, get_thruster_geometry(np.pi / 4, 2.0, 3.0))
+        self.assertIsNot(geometry, get_thruster_geometry(np.pi / 4, 2.0, 1.0))
+
+        # 0-d array parameters share the cached geometry of the equal floats
+        for vectorized in (False, True):
+            expected = simulate_auv2_motion(T, 0.3, 1, 1, vectorized=vectorized)
+            actual = simulate_auv2_motion(
+                T, np.array(0.3), np.array(1.0), 1, vectorized=vectorized
+            )
+            for channel, reference in zip(actual, expected):
+                self.assertTrue(np.array_equal(channel, reference))
+        stepper = AUV2Stepper(np.array(0.3), 1.0, np.array(1.0))
+        self.assertIs(stepper.geometry, get_thruster_geometry(0.3, 1.0, 1.0))
+        self.assertTrue(
+            np.array_equal(
+                calculate_auv2_acceleration(T, np.pi / 4, np.pi / 6, 1.0, geometry),
+                calculate_auv2_acceleration(T, np.pi / 4, np.pi / 6, 1.0),
+            )
+        )
+        self.assertEqual(
+            calculate_auv2_angular_acceleration(T, np.pi / 4, 2.0, 3.0, 1.0, geometry),
+            calculate_auv2_angular_acceleration(T, np.pi / 4, 2.0, 3.0, 1.0),
+        )
+
+        self.assertRaises(
+            ValueError,
+            simulate_auv2_motion,
+            T,
+            np.pi / 3,
+            2.0,
+            3.0,
+            geometry=geometry,
+        )
+        self.assertRaises(
+            ValueError,
+            calculate_auv2_acceleration,
+            T,
+            np.pi / 3,
+            np.pi / 6,
+            1.0,
+            geometry,
+        )
+        self.assertRaises(
+            ValueError,
+            calculate_auv2_angular_acceleration,
+            T,
+            np.pi / 4,
+            3.0,
+            2.0,
+            1.0,
+            geometry,
+        )
+
+    def test_allocate_auv2_thrusts(self):
+        allocation = get_thruster_allocation(np.pi / 3, 3.0, 2.0, 80, 120)
+        self.assertIs(allocation, get_thruster_allocation(np.pi / 3, 3.0, 2.0, 80, 120))
+        self.assertTrue(
+            np.allclose(allocation.matrix @ allocation.pseudo_inverse, np.eye(3))
+        )
+
+        # Allocated thrusts reproduce the desired accelerations through the forward model
+        desired = np.array([[0.5, -0.2, 0.1], [0.0, 0.0, 0.0], [-1.0, 2.0, -0.3]])
+        T = allocate_auv2_thrusts(desired, np.pi / 3, 3.0, 2.0, 80, 120)
+        self.assertEqual(T.shape, (3, 4))
+        for target, thrust in zip(desired, T):
+            self.assertTrue(
+                np.allclose(
+                    calculate_auv2_acceleration(thrust, np.pi / 3, 0, 80), target[:2]
+                )
+            )
+            self.assertAlmostEqual(
+                calculate_auv2_angular_acceleration(thrust, np.pi / 3, 3.0, 2.0, 120),
+                target[2],
+            )
+
+        theta = np.array([0.3, -1.0, 2.0])
+        T = allocate_auv2_thrusts(desired, np.pi / 3, 3.0, 2.0, 80, 120, theta=theta)
+        for target, thrust, heading in zip(desired, T, theta):
+            self.assertTrue(
+                np.allclose(
+                    calculate_auv2_acceleration(thrust, np.pi / 3, heading, 80),
+                    target[:2],
+                )
+            )
+        single = allocate_auv2_thrusts(
+            desired[0], np.pi / 3, 3.0, 2.0, 80, 120, theta=0.3
+        )
+        self.assertTrue(np.allclose(single, T[0]))
+
+        # Clipping limits each thruster on its own, scaling shrinks the whole vector
+        big = np.array([[5.0, 3.0, 0.5]])
+        T = allocate_auv2_thrusts(big, np.pi / 3, 3.0, 2.0, 80, 120)
+        clipped = allocate_auv2_thrusts(
+            big, np.pi / 3, 3.0, 2.0, 80, 120, T_min=-100, T_max=100
+        )
+        self.assertTrue(np.allclose(clipped, np.clip(T, -100, 100)))
+        scaled = allocate_auv2_thrusts(
+            big, np.pi / 3, 3.0, 2.0, 80, 120, T_min=-100, T_max=100, saturation="scale"
+        )
+        self.assertAlmostEqual(np.abs(scaled).max(), 100)
+        self.assertTrue(np.allclose(scaled / T, scaled[0, 0] / T[0, 0]))
+
+        self.assertRaises(
+            ValueError, allocate_auv2_thrusts, np.ones(4), np.pi / 3, 3.0, 2.0
+        )
+        self.assertRaises(
+            ValueError,
+            allocate_auv2_thrusts,
+            big,
+            np.pi / 3,
+            3.0,
+            2.0,
+            T_min=10,
+            T_max=100,
+            saturation="scale",
+        )
+        self.assertRaises(
+            ValueError, allocate_auv2_thrusts, big, np.pi / 3, 3.0, 2.0, saturation="x"
+        )
+        self.assertRaises(ValueError, get_thruster_allocation, np.pi / 3, 3.0, 2.0, 0)
+        self.assertRaises(TypeError, allocate_auv2_thrusts, [1, 2, 3], 0.5, 1.0, 1.0)
+
     def test_simulate_auv2_motion(self):
         T = np.array([1.0, 9.0, 2.0, 1.0])
         alpha = np.pi / 6
@@ -259,6 +576,799 @@ class TestPhysics(unittest.TestCase):
             -10.0,
         )
 
+    def test_simulate_auv2_motion_heading(self):
+        T = np.array([40.0, 60.0, 80.0, 100.0])
+        t, x, y, theta, v, omega, a = simulate_auv2_motion(
+            T, np.pi / 3, 3.0, 2.0, 50, 100, 0.1, 1.0, 0, 0, 0.5
+        )
+
+        # The first acceleration divides by the mass rather than the inertia, and each
+        # later one is rotated by the heading at the end of the previous step
+        self.assertTrue(
+            np.allclose(a[0], calculate_auv2_acceleration(T, np.pi / 3, 0.5, 100))
+        )
+        for i in range(1, len(t)):
+            self.assertTrue(
+                np.allclose(
+                    a[i], calculate_auv2_acceleration(T, np.pi / 3, theta[i - 1], 100)
+                )
+            )
+
+    def test_simulate_auv2_motion_state_block(self):
+        t, x, y, theta, v, omega, a = simulate_auv2_motion(
+            np.array([40.0, 60.0, 80.0, 100.0]), np.pi / 3, 3.0, 2.0
+        )
+
+        state = x.base
+        self.assertEqual(state.shape, (len(t), len(AUV2_STATE_COLUMNS)))
+        self.assertTrue(state.flags.c_contiguous)
+        for channel in (y, theta, v, omega, a):
+            self.assertIs(channel.base, state)
+        for expected, actual in zip(
+            auv2_state_channels(state), (x, y, theta, v, omega, a)
+        ):
+            self.assertTrue(np.array_equal(expected, actual))
+        self.assertTrue(np.array_equal(state[:, 6:], a))
+
+    def test_simulate_auv2_motion_backends(self):
+        args = (np.array([40.0, 60.0, 80.0, 100.0]), np.pi / 3, 3.0, 2.0)
+        expected = simulate_auv2_motion(*args, dt=0.01, backend="numpy")
+
+        with mock.patch.dict(os.environ, {"AUV2_BACKEND": "numpy"}):
+            for channel, actual in zip(expected, simulate_auv2_motion(*args, dt=0.01)):
+                self.assertTrue(np.array_equal(channel, actual))
+
+        # The backend is looked up once, not on every run
+        simulate_auv2_motion(*args, t_final=0.1)
+        hits = physics._load_auv2_kernel.cache_info().hits
+        simulate_auv2_motion(*args, t_final=0.1)
+        self.assertEqual(physics._load_auv2_kernel.cache_info().hits, hits + 1)
+
+        if importlib.util.find_spec("numba") is None:
+            self.assertRaises(ImportError, simulate_auv2_motion, *args, backend="numba")
+        else:
+            compiled = simulate_auv2_motion(*args, dt=0.01, backend="numba")
+            for channel, actual in zip(expected, compiled):
+                self.assertTrue(np.allclose(channel, actual, rtol=1e-12, atol=1e-14))
+
+        self.assertRaises(ValueError, simulate_auv2_motion, *args, backend="cuda")
+        with mock.patch.dict(os.environ, {"AUV2_BACKEND": "cuda"}):
+            self.assertRaises(ValueError, simulate_auv2_motion, *args)
+
+    def test_auv2_stepper(self):
+        T = np.array([40.0, 60.0, 80.0, 100.0])
+        stepper = AUV2Stepper(np.pi / 3, 3.0, 2.0, 100, 80, 1.0, -1.0, 0.5)
+        t, x, y, theta, v, omega, a = simulate_auv2_motion(
+            T, np.pi / 3, 3.0, 2.0, 100, 80, 0.1, 10, 1.0, -1.0, 0.5
+        )
+        state = stepper.state
+        for i in range(1, len(t)):
+            self.assertIs(stepper.step(T, 0.1), state)
+            self.assertTrue(
+                np.allclose(
+                    state, [x[i], y[i], theta[i], *v[i], omega[i], *a[i]], rtol=1e-12
+                )
+            )
+        self.assertAlmostEqual(stepper.time, t[-1])
+
+        # Thrust may change every step, like a thrust schedule
+        schedule = np.random.default_rng(0).uniform(0, 100, (50, 4))
+        t, x, y, theta, v, omega, a = simulate_auv2_motion(
+            schedule, np.pi / 3, 3.0, 2.0, dt=0.1, t_final=5.0
+        )
+        stepper = AUV2Stepper(np.pi / 3, 3.0, 2.0)
+        for i in range(1, len(t)):
+            stepper.step(schedule[i], 0.1)
+        self.assertTrue(np.allclose(stepper.state[:3], [x[-1], y[-1], theta[-1]]))
+
+        stepper.reset(2.0, 3.0, 0.1)
+        self.assertEqual(stepper.state.tolist(), [2.0, 3.0, 0.1, 0, 0, 0, 0, 0])
+        self.assertEqual(stepper.time, 0)
+        self.assertRaises(AttributeError, setattr, stepper, "velocity", 0)
+
+        # Steps allocate no arrays, so memory held does not grow with the step count
+        tracemalloc.start()
+        try:
+            for _ in range(1000):
+                stepper.step(T, 0.01)
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertLess(current, 256)
+        self.assertLess(peak, 1024)
+
+        self.assertRaises(TypeError, stepper.step, [1, 2, 3, 4], 0.1)
+        self.assertRaises(ValueError, stepper.step, T, -0.1)
+        self.assertRaises(ValueError, AUV2Stepper, np.pi / 3, 3.0, 2.0, 100, 0)
+        self.assertRaises(
+            ValueError,
+            AUV2Stepper,
+            np.pi / 3,
+            3.0,
+            2.0,
+            geometry=get_thruster_geometry(0.5, 3.0, 2.0),
+        )
+
+    def test_simulate_auv2_motion_resume(self):
+        T = np.array([40.0, 60.0, 80.0, 100.0])
+        changed = np.array([90.0, 10.0, 30.0, 50.0])
+        args = (np.pi / 3, 3.0, 2.0, 100, 80, 0.1, 10, 1.0, -1.0, 0.5)
+
+        *full, info = simulate_auv2_motion(
+            T, *args, full_output=True, checkpoint_interval=25, backend="numpy"
+        )
+        checkpoints = info["checkpoints"]
+        self.assertEqual([c.step for c in checkpoints], [0, 25, 50, 75])
+        checkpoint = checkpoints[2]
+        self.assertAlmostEqual(checkpoint.time, full[0][50])
+        self.assertEqual(AUV2Checkpoint.from_bytes(checkpoint.to_bytes()), checkpoint)
+        self.assertEqual(len(checkpoint.to_bytes()), 80)
+
+        # Resuming with the same inputs reproduces the rest of the run
+        resumed = simulate_auv2_motion(T, *args, resume=checkpoint, backend="numpy")
+        for channel, expected in zip(resumed, full):
+            self.assertTrue(np.array_equal(channel, expected[50:]))
+
+        # Resuming with new inputs matches a run whose thrust changes after the checkpoint
+        schedule = np.tile(T, (100, 1))
+        schedule[51:] = changed
+        scheduled = simulate_auv2_motion(schedule, *args)
+        for vectorized in (False, True):
+            *resumed, info = simulate_auv2_motion(
+                changed,
+                *args,
+                vectorized=vectorized,
+                resume=checkpoint,
+                full_output=True,
+                checkpoint_interval=20,
+            )
+            self.assertEqual([c.step for c in info["checkpoints"]], [60, 80])
+            for channel, expected in zip(resumed, scheduled):
+                self.assertTrue(np.allclose(channel, expected[50:]))
+        self.assertTrue(
+            np.allclose(
+                simulate_auv2_motion(
+                    schedule[50:],
+                    *args,
+                    resume=AUV2Checkpoint.from_bytes(checkpoint.to_bytes()),
+                )[1],
+                scheduled[1][50:],
+            )
+        )
+
+        # Events report times on the time grid of the whole run
+        box = bounding_box_event(-100, 100, -100, 0.0)
+        stepped = simulate_auv2_motion(
+            changed, *args, events=[box], resume=checkpoint, full_output=True
+        )
+        fast = simulate_auv2_motion(
+            changed,
+            *args,
+            events=[box],
+            resume=checkpoint,
+            full_output=True,
+            vectorized=True,
+        )
+        self.assertGreater(stepped[-1]["event_time"], checkpoint.time)
+        self.assertAlmostEqual(stepped[-1]["event_time"], fast[-1]["event_time"])
+
+        self.assertRaises(
+            ValueError,
+            simulate_auv2_motion,
+            T,
+            np.pi / 3,
+            3.0,
+            2.0,
+            dt=0.05,
+            resume=checkpoint,
+        )
+        self.assertRaises(
+            ValueError,
+            simulate_auv2_motion,
+            T,
+            np.pi / 3,
+            3.0,
+            2.0,
+            t_final=5.0,
+            resume=checkpoint,
+        )
+        self.assertRaises(
+            ValueError,
+            simulate_auv2_motion,
+            T,
+            np.pi / 3,
+            3.0,
+            2.0,
+            integrator="rk4",
+            resume=checkpoint,
+        )
+        self.assertRaises(
+            ValueError, simulate_auv2_motion, T, *args, checkpoint_interval=0
+        )
+        self.assertRaises(ValueError, AUV2Checkpoint, 0, 0.1, [0.0] * 6)
+
+    def test_simulate_auv2_motion_output(self):
+        T = np.array([40.0, 60.0, 80.0, 100.0])
+        args = (T, np.pi / 3, 3.0, 2.0, 100, 100, 0.01, 100)
+        full = simulate_auv2_motion(*args, backend="numpy")
+
+        # float32 storage rounds each stored value once; accumulation stays in float64
+        for vectorized in (False, True):
+            stored = simulate_auv2_motion(
+                *args, dtype=np.float32, vectorized=vectorized, backend="numpy"
+            )
+            self.assertEqual(stored[0].dtype, np.float64)
+            for channel, expected in zip(stored[1:], full[1:]):
+                self.assertEqual(channel.dtype, np.float32)
+                self.assertTrue(
+                    np.all(
+                        np.abs(channel - expected)
+                        <= 2**-24 * np.abs(expected) + 1e-12 * np.abs(expected).max()
+                    )
+                )
+
+        # Skipping v and a and storing in float32 uses a third of the memory
+        t, x, y, theta, omega = simulate_auv2_motion(
+            *args, dtype=np.float32, channels=("t", "x", "y", "theta", "omega")
+        )
+        self.assertTrue(np.allclose(theta, full[3], rtol=1e-6))
+        self.assertEqual(x.base.nbytes, len(t) * 4 * 4)
+        self.assertEqual(
+            sum(channel.nbytes for channel in full), 3 * (t.nbytes + x.base.nbytes)
+        )
+
+        # Channels are written into caller-owned buffers, such as memory maps
+        with tempfile.TemporaryDirectory() as directory:
+            out = np.memmap(
+                os.path.join(directory, "run.dat"),
+                dtype=np.float32,
+                mode="w+",
+                shape=(len(full[0]), 4),
+            )
+            x, y, a = simulate_auv2_motion(*args, out=out, channels=("x", "y", "a"))
+            self.assertTrue(np.shares_memory(x, out) and np.shares_memory(a, out))
+            self.assertTrue(np.allclose(out[:, 0], full[1], rtol=1e-6))
+            self.assertTrue(np.allclose(out[:, 2:], full[6], rtol=1e-6, atol=1e-9))
+            del x, y, a, out
+
+        # The vectorized path fills the block chunk by chunk, matching the full scan
+        scanned = simulate_auv2_motion(*args, vectorized=True)
+        packed = simulate_auv2_motion(*args, vectorized=True, dtype=np.float64)
+        for channel, expected in zip(packed, scanned):
+            self.assertTrue(np.array_equal(channel, expected))
+        *_, info = simulate_auv2_motion(
+            *args, checkpoint_interval=5000, full_output=True, backend="numpy"
+        )
+        resumed = simulate_auv2_motion(
+            *args, resume=info["checkpoints"][1], vectorized=True
+        )
+        packed = simulate_auv2_motion(
+            *args, resume=info["checkpoints"][1], vectorized=True, dtype=np.float64
+        )
+        for channel, expected in zip(packed, resumed):
+            self.assertTrue(np.array_equal(channel, expected))
+
+        # Only one chunk of the float64 trajectory is held at a time
+        peaks = []
+        for options in ({}, {"dtype": np.float32, "channels": ("t", "x", "y")}):
+            tracemalloc.start()
+            simulate_auv2_motion(*args[:6], 0.001, 100, vectorized=True, **options)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        self.assertLess(peaks[1], peaks[0] / 3)
+
+        rk4 = simulate_auv2_motion(*args, integrator="rk4", channels=("v",))
+        self.assertEqual(len(rk4), 1)
+        self.assertEqual(rk4[0].shape, (len(full[0]), 2))
+
+        box = bounding_box_event(-10, 10, -10, 10)
+        *stopped, info = simulate_auv2_motion(
+            *args,
+            events=[box],
+            channels=("t", "x", "y", "theta", "v", "omega"),
+            dtype=np.float32,
+            full_output=True,
+        )
+        self.assertIsNotNone(info["event"])
+        self.assertEqual(len(stopped), 6)
+
+        self.assertRaises(
+            ValueError, simulate_auv2_motion, *args, events=[box], channels=("x",)
+        )
+        self.assertRaises(
+            ValueError,
+            simulate_auv2_motion,
+            *args,
+            checkpoint_interval=10,
+            channels=("x",),
+        )
+        # Selecting only t stores no columns, and selecting nothing is an error
+        for options in ({}, {"vectorized": True}, {"full_output": True}):
+            result = simulate_auv2_motion(*args, channels=("t",), **options)
+            self.assertTrue(np.array_equal(result[0], full[0]))
+            self.assertEqual(len(result), 2 if options.get("full_output") else 1)
+            self.assertRaises(
+                ValueError, simulate_auv2_motion, *args, channels=(), **options
+            )
+        self.assertRaises(ValueError, simulate_auv2_motion, *args, channels=("z",))
+        self.assertRaises(ValueError, simulate_auv2_motion, *args, dtype=np.int32)
+        self.assertRaises(
+            ValueError, simulate_auv2_motion, *args, out=np.zeros((len(full[0]), 7))
+        )
+        self.assertRaises(
+            ValueError,
+            simulate_auv2_motion,
+            *args,
+            integrator="rk45",
+            out=np.zeros((len(full[0]), 8)),
+        )
+
+    def test_auv2_output_block(self):
+        row = tuple(float(k) for k in range(len(AUV2_STATE_COLUMNS)))
+        t = np.arange(3.0)
+
+        full = physics._AUV2OutputBlock(AUV2_OUTPUT_CHANNELS, 3)
+        self.assertTrue(full.full)
+        full.store_row(1, row)
+        _, x, y, theta, v, omega, a = full.views(t)
+        self.assertEqual((x[1], y[1], theta[1], omega[1]), (0.0, 1.0, 2.0, 5.0))
+        self.assertTrue(np.array_equal(v[1], [3.0, 4.0]))
+        self.assertTrue(np.array_equal(a[1], [6.0, 7.0]))
+        self.assertTrue(np.shares_memory(x, full.block))
+
+        # Only the columns of the selected channels are stored
+        partial = physics._AUV2OutputBlock(("t", "theta", "a"), 3, np.float32)
+        partial.store_row(2, row)
+        self.assertEqual(partial.block.shape, (3, 3))
+        self.assertEqual(partial.block.dtype, np.float32)
+        self.assertTrue(np.array_equal(partial.block[2], [2.0, 6.0, 7.0]))
+        t_stop, theta, a = partial.views(t, stop=2)
+        self.assertEqual((len(t_stop), len(theta), len(a)), (2, 2, 2))
+        (theta,) = partial.views(t, channels=("theta",))
+        self.assertEqual(theta[2], 2.0)
+
+        single = physics._AUV2OutputBlock(("omega",), 3)
+        single.store_row(0, row)
+        self.assertEqual(single.block[0, 0], 5.0)
+
+        empty = physics._AUV2OutputBlock(("t",), 3)
+        empty.store_row(0, row)
+        empty.store_rows(0, (t,) + (np.zeros(3),) * 6)
+        self.assertEqual(empty.block.shape, (3, 0))
+        self.assertEqual(len(empty.views(t)), 1)
+
+        trajectory = simulate_auv2_motion(
+            np.array([40.0, 60.0, 80.0, 100.0]), np.pi / 3, 3.0, 2.0
+        )
+        out = np.empty((len(trajectory[0]) + 5, 3))
+        x, v = physics._AUV2OutputBlock.pack(trajectory, ("x", "v"), out=out)
+        self.assertTrue(np.shares_memory(x, out))
+        self.assertTrue(np.array_equal(x, trajectory[1]))
+        self.assertTrue(np.array_equal(v, trajectory[4]))
+
+    def test_simulate_auv2_motion_vectorized(self):
+        for T, alpha, L, l, kwargs in [
+            (np.array([1.0, 9.0, 2.0, 1.0]), np.pi / 6, 1.0, 0.5, {}),
+            (
+                np.array([40.0, 60.0, 80.0, 100.0]),
+                np.pi / 3,
+                3.0,
+                2.0,
+                {"t_final": 100.0, "dt": 0.01, "x0": 2.0, "y0": -1.0, "theta0": 0.3},
+            ),
+        ]:
+            stepped = simulate_auv2_motion(T, alpha, L, l, **kwargs)
+            scanned = simulate_auv2_motion(T, alpha, L, l, vectorized=True, **kwargs)
+
+            t, x, y, theta, v, omega, a = stepped
+            t_s, x_s, y_s, theta_s, v_s, omega_s, a_s = scanned
+            self.assertTrue(np.array_equal(t, t_s))
+            self.assertTrue(np.array_equal(theta, theta_s))
+            self.assertTrue(np.array_equal(omega, omega_s))
+            for expected, actual in [(x, x_s), (y, y_s), (v, v_s), (a, a_s)]:
+                self.assertLessEqual(
+                    np.max(np.abs(expected - actual)), 1e-14 * np.max(np.abs(expected))
+                )
+
+    def test_expand_segment_schedule(self):
+        schedule = expand_segment_schedule(
+            [0.0, 0.25], [[1.0, 2.0, 3.0, 4.0], [0.0, 0.0, 0.0, 0.0]], 0.1, 0.5
+        )
+        self.assertTrue(
+            np.array_equal(
+                schedule,
+                [[1.0, 2.0, 3.0, 4.0]] * 3 + [[0.0, 0.0, 0.0, 0.0]] * 2,
+            )
+        )
+
+        self.assertRaises(ValueError, expand_segment_schedule, [1.0], [0.5])
+        self.assertRaises(ValueError, expand_segment_schedule, [0.0, 0.0], [0.5, 0.6])
+        self.assertRaises(ValueError, expand_segment_schedule, [0.0, 1.0], [0.5])
+
+    def test_simulate_auv2_motion_schedule(self):
+        T = np.array([40.0, 60.0, 80.0, 100.0])
+        dt = 0.01
+        t_final = 20.0
+        thrusts = expand_segment_schedule(
+            [0.0, 5.0, 12.0],
+            [T, [10.0, 0.0, 10.0, 0.0], [0.0, 0.0, 0.0, 0.0]],
+            dt,
+            t_final,
+        )
+        angles = expand_segment_schedule(
+            [0.0, 8.0], [np.pi / 3, np.pi / 6], dt, t_final
+        )
+
+        constant = simulate_auv2_motion(T, np.pi / 3, 3.0, 2.0, dt=dt, t_final=t_final)
+        repeated = simulate_auv2_motion(
+            np.tile(T, (len(thrusts), 1)),
+            np.full(len(thrusts), np.pi / 3),
+            3.0,
+            2.0,
+            dt=dt,
+            t_final=t_final,
+        )
+        for expected, actual in zip(constant, repeated):
+            self.assertTrue(np.allclose(expected, actual))
+
+        for schedule in [(thrusts, np.pi / 3), (T, angles), (thrusts, angles)]:
+            stepped = simulate_auv2_motion(*schedule, 3.0, 2.0, dt=dt, t_final=t_final)
+            scanned = simulate_auv2_motion(
+                *schedule, 3.0, 2.0, dt=dt, t_final=t_final, vectorized=True
+            )
+            for expected, actual in zip(stepped, scanned):
+                self.assertTrue(np.allclose(expected, actual))
+
+        # Once the thrusters are switched off the AUV coasts at constant velocity
+        t, x, y, theta, v, omega, a = simulate_auv2_motion(
+            thrusts, angles, 3.0, 2.0, dt=dt, t_final=t_final
+        )
+        self.assertTrue(np.allclose(a[1201:], 0.0))
+        self.assertTrue(np.allclose(v[1201:], v[1200]))
+
+        self.assertRaises(
+            ValueError,
+            simulate_auv2_motion,
+            thrusts[1:],
+            np.pi / 3,
+            3.0,
+            2.0,
+            100,
+            100,
+            dt,
+            t_final,
+        )
+        self.assertRaises(
+            ValueError,
+            simulate_auv2_motion,
+            T,
+            angles,
+            3.0,
+            2.0,
+            dt=dt,
+            t_final=t_final,
+            geometry=get_thruster_geometry(np.pi / 3, 3.0, 2.0),
+        )
+        self.assertRaises(
+            ValueError,
+            simulate_auv2_motion_chunks,
+            thrusts,
+            np.pi / 3,
+            3.0,
+            2.0,
+            100,
+            100,
+            dt,
+            t_final,
+        )
+
+    def test_simulate_auv2_motion_chunks(self):
+        T = np.array([40.0, 60.0, 80.0, 100.0])
+        kwargs = {"dt": 0.01, "t_final": 50.0, "x0": 2.0, "theta0": 0.3}
+
+        chunks = list(
+            simulate_auv2_motion_chunks(
+                T, np.pi / 3, 3.0, 2.0, chunk_size=777, **kwargs
+            )
+        )
+        self.assertTrue(all(len(chunk[0]) <= 777 for chunk in chunks))
+
+        stepped = simulate_auv2_motion(T, np.pi / 3, 3.0, 2.0, **kwargs)
+        scanned = simulate_auv2_motion(
+            T, np.pi / 3, 3.0, 2.0, vectorized=True, **kwargs
+        )
+        for k in range(7):
+            streamed = np.concatenate([chunk[k] for chunk in chunks])
+            self.assertTrue(np.array_equal(scanned[k], streamed))
+            self.assertTrue(np.allclose(stepped[k], streamed))
+
+        self.assertRaises(
+            ValueError,
+            simulate_auv2_motion_chunks,
+            T,
+            np.pi / 3,
+            3.0,
+            2.0,
+            chunk_size=0,
+        )
+        self.assertRaises(
+            ValueError, simulate_auv2_motion_chunks, T, np.pi / 3, -3.0, 2.0
+        )
+
+    def test_simulate_auv2_motion_integrators(self):
+        args = (np.array([40.0, 60.0, 80.0, 100.0]), np.pi / 3, 3.0, 2.0)
+        a_angular = calculate_auv2_angular_acceleration(*args)
+
+        t, x, y, theta, v, omega, a, info = simulate_auv2_motion(
+            *args,
+            dt=0.01,
+            t_final=10.0,
+            integrator="rk45",
+            rtol=1e-10,
+            full_output=True,
+        )
+        self.assertEqual(t[-1], 10.0)
+        self.assertEqual(info["steps"], len(t) - 1)
+        self.assertTrue(np.allclose(theta, 0.5 * a_angular * t**2))
+        self.assertTrue(np.allclose(omega, a_angular * t))
+        reference = (x[-1], y[-1])
+
+        for integrator, dt, tolerance in [
+            ("euler", 0.001, 1e-3),
+            ("rk4", 0.1, 1e-4),
+            ("verlet", 0.01, 1e-4),
+        ]:
+            t, x, y, theta, v, omega, a, info = simulate_auv2_motion(
+                *args, dt=dt, t_final=10.0 + dt, integrator=integrator, full_output=True
+            )
+            self.assertEqual(info["integrator"], integrator)
+            self.assertEqual(info["steps"], len(t) - 1)
+            self.assertAlmostEqual(t[-1], 10.0)
+            self.assertTrue(
+                np.allclose((x[-1], y[-1]), reference, rtol=0, atol=tolerance)
+            )
+
+        # rk45 ends exactly at t_final, while the fixed-step grid stops short of it
+        *short, info = simulate_auv2_motion(
+            *args, t_final=0.05, integrator="rk45", full_output=True
+        )
+        self.assertTrue(np.array_equal(short[0], [0.0, 0.05]))
+        self.assertEqual(info["steps"], 1)
+        for integrator in ("euler", "rk4", "verlet"):
+            t = simulate_auv2_motion(*args, t_final=0.05, integrator=integrator)[0]
+            self.assertTrue(np.array_equal(t, [0.0]))
+
+        # Every integrator returns no steps when no time elapses
+        for integrator in ("euler", "rk4", "verlet", "rk45"):
+            t, x, y, theta, v, omega, a = simulate_auv2_motion(
+                *args, t_final=0, integrator=integrator
+            )
+            self.assertEqual(len(t), 0)
+            self.assertEqual(v.shape, (0, 2))
+            self.assertEqual(a.shape, (0, 2))
+        self.assertEqual(
+            len(simulate_auv2_motion(*args, t_final=0, vectorized=True)[0]), 0
+        )
+
+        self.assertRaises(
+            ValueError, simulate_auv2_motion, *args, integrator="leapfrog"
+        )
+        self.assertRaises(
+            ValueError, simulate_auv2_motion, *args, integrator="rk4", vectorized=True
+        )
+
+    def test_simulate_auv2_motion_events(self):
+        args = (np.array([40.0, 60.0, 80.0, 100.0]), np.pi / 3, 3.0, 2.0)
+        t, x, y, theta, v, omega, a = simulate_auv2_motion(*args, dt=0.001)
+
+        def heading_event(t, x, y, theta, v, omega):
+            return theta + 1.0
+
+        for events, expected_steps in [
+            ([heading_event], np.flatnonzero(theta < -1.0)[0]),
+            ([bounding_box_event(-5.0, 5.0, -1.0, 1.0)], np.flatnonzero(y > 1.0)[0]),
+            (
+                [pressure_limit_event(calculate_pressure(0.5))],
+                np.flatnonzero(y > 0.5)[0],
+            ),
+            ([waypoint_event(x[5000], y[5000], 1e-9)], 5000),
+        ]:
+            for vectorized in (False, True):
+                *result, info = simulate_auv2_motion(
+                    *args,
+                    dt=0.001,
+                    vectorized=vectorized,
+                    events=events,
+                    full_output=True,
+                )
+                self.assertEqual(info["event"], 0)
+                self.assertEqual(info["steps"], expected_steps)
+                self.assertEqual(len(result[0]), expected_steps + 1)
+                self.assertTrue(np.allclose(result[1], x[: expected_steps + 1]))
+
+        *result, info = simulate_auv2_motion(
+            *args, dt=0.001, events=[heading_event], full_output=True
+        )
+        self.assertTrue(result[0][-2] <= info["event_time"] <= result[0][-1])
+        self.assertAlmostEqual(
+            info["event_time"],
+            math.sqrt(2 / -calculate_auv2_angular_acceleration(*args)),
+            2,
+        )
+
+        *result, info = simulate_auv2_motion(
+            *args, events=[waypoint_event(100.0, 100.0, 1.0)], full_output=True
+        )
+        self.assertEqual(len(result[0]), 100)
+        self.assertIsNone(info["event"])
+        self.assertIsNone(info["event_time"])
+
+        self.assertRaises(
+            ValueError,
+            simulate_auv2_motion,
+            *args,
+            integrator="rk4",
+            events=[heading_event],
+        )
+        self.assertRaises(ValueError, waypoint_event, 0.0, 0.0, 0.0)
+        self.assertRaises(ValueError, bounding_box_event, 1.0, -1.0, -1.0, 1.0)
+        self.assertRaises(ValueError, pressure_limit_event, 1000.0)
+
+    def test_simulate_auv2_monte_carlo(self):
+        T = np.array([40.0, 60.0, 80.0, 100.0])
+        spread = dict(
+            thrust_std=2.0, alpha_std=0.02, mass_std=5.0, inertia_std=5.0, seed=3
+        )
+
+        result = simulate_auv2_monte_carlo(
+            T, np.pi / 3, 3.0, 2.0, t_final=2.0, samples=50, batch_size=7, **spread
+        )
+        self.assertEqual(result["samples"], 50)
+        self.assertEqual(result["mean"].shape, (len(result["t"]), 3))
+        self.assertEqual(result["covariance"].shape, (len(result["t"]), 3, 3))
+        self.assertEqual(result["percentiles"].shape, (3, len(result["t"]), 3))
+
+        # Redraw the same perturbations in one batch and keep every trajectory
+        rng = np.random.default_rng(3)
+        _, x, y, theta, _, _, _ = simulate_auv2_motion_batch(
+            T + rng.normal(0.0, 2.0, (50, 4)),
+            np.pi / 3 + rng.normal(0.0, 0.02, 50),
+            3.0,
+            2.0,
+            100 + rng.normal(0.0, 5.0, 50),
+            100 + rng.normal(0.0, 5.0, 50),
+            t_final=2.0,
+        )
+        whole = simulate_auv2_monte_carlo(
+            T, np.pi / 3, 3.0, 2.0, t_final=2.0, samples=50, batch_size=50, **spread
+        )
+        ensemble = np.stack((x, y, theta), axis=-1)
+        for stats in (result, whole):
+            self.assertTrue(np.allclose(stats["mean"], ensemble.mean(axis=0)))
+            for i in range(len(result["t"])):
+                self.assertTrue(
+                    np.allclose(stats["covariance"][i], np.cov(ensemble[:, i].T))
+                )
+        self.assertTrue(
+            np.allclose(
+                whole["percentiles"], np.percentile(ensemble, (5, 50, 95), axis=0)
+            )
+        )
+        self.assertTrue(np.all(result["covariance"][-1].diagonal() > 0))
+
+        # The reservoir keeps the same samples whatever the batch size once it overflows
+        small = dict(spread, reservoir_size=8, percentiles=(0, 100))
+        sampled = [
+            simulate_auv2_monte_carlo(
+                T,
+                np.pi / 3,
+                3.0,
+                2.0,
+                t_final=2.0,
+                samples=50,
+                batch_size=size,
+                **small,
+            )["percentiles"]
+            for size in (1, 7, 50)
+        ]
+        for percentiles in sampled[1:]:
+            self.assertTrue(np.array_equal(percentiles, sampled[0]))
+        self.assertTrue(np.all(sampled[0][0] >= ensemble.min(axis=0) - 1e-12))
+        self.assertTrue(np.all(sampled[0][1] <= ensemble.max(axis=0) + 1e-12))
+
+        # Without perturbations the ensemble collapses onto the nominal trajectory
+        nominal = simulate_auv2_monte_carlo(T, np.pi / 3, 3.0, 2.0, samples=4)
+        t, x, y, theta, v, omega, a = simulate_auv2_motion(T, np.pi / 3, 3.0, 2.0)
+        self.assertTrue(np.allclose(nominal["mean"], np.stack((x, y, theta), axis=-1)))
+        self.assertTrue(np.allclose(nominal["covariance"], 0))
+        self.assertTrue(np.allclose(nominal["percentiles"][1], nominal["mean"]))
+
+        self.assertRaises(
+            ValueError, simulate_auv2_monte_carlo, T, 0.5, 1.0, 1.0, samples=0
+        )
+        self.assertRaises(
+            ValueError, simulate_auv2_monte_carlo, T, 0.5, 1.0, 1.0, mass_std=-1
+        )
+        self.assertRaises(
+            ValueError, simulate_auv2_monte_carlo, T, 0.5, 1.0, 1.0, percentiles=(101,)
+        )
+        with self.assertRaises(InvalidInputError) as context:
+            simulate_auv2_monte_carlo(T, 0.5, 1.0, 1.0, samples=20, mass_std=200.0)
+        self.assertIn("mass_std", str(context.exception))
+        self.assertRaises(
+            TypeError, simulate_auv2_monte_carlo, [1, 2, 3, 4], 0.5, 1.0, 1.0
+        )
+
+    def test_simulate_auv2_motion_batch(self):
+        T = np.array(
+            [[1.0, 9.0, 2.0, 1.0], [40.0, 60.0, 80.0, 100.0], [5.0, 5.0, 5.0, 5.0]]
+        )
+        alpha = np.array([np.pi / 6, np.pi / 3, np.pi / 4])
+        L = np.array([1.0, 3.0, 2.0])
+        l = np.array([0.5, 2.0, 1.0])
+        mass = np.array([100.0, 50.0, 80.0])
+        theta0 = np.array([0.0, 0.5, -1.0])
+
+        t_b, x_b, y_b, theta_b, v_b, omega_b, a_b = simulate_auv2_motion_batch(
+            T, alpha, L, l, 100, mass, 0.1, 5.0, 1.0, -1.0, theta0
+        )
+        self.assertEqual(x_b.shape, (3, len(t_b)))
+        self.assertEqual(v_b.shape, (3, len(t_b), 2))
+
+        for k in range(3):
+            t, x, y, theta, v, omega, a = simulate_auv2_motion(
+                T[k], alpha[k], L[k], l[k], 100, mass[k], 0.1, 5.0, 1.0, -1.0, theta0[k]
+            )
+            self.assertTrue(np.allclose(t, t_b))
+            self.assertTrue(np.allclose(x, x_b[k]))
+            self.assertTrue(np.allclose(y, y_b[k]))
+            self.assertTrue(np.allclose(theta, theta_b[k]))
+            self.assertTrue(np.allclose(v, v_b[k]))
+            self.assertTrue(np.allclose(omega, omega_b[k]))
+            self.assertTrue(np.allclose(a, a_b[k]))
+
+        self.assertRaises(
+            ValueError, simulate_auv2_motion_batch, np.ones((3, 3)), 0.5, 1.0, 1.0
+        )
+        self.assertRaises(
+            ValueError,
+            simulate_auv2_motion_batch,
+            T,
+            0.5,
+            np.array([1.0, -1.0, 1.0]),
+            1.0,
+        )
+        self.assertRaises(
+            TypeError, simulate_auv2_motion_batch, [1, 2, 3, 4], 0.5, 1, 1
+        )
+
+    def test_step_auv2_batch(self):
+        T = np.array([[1.0, 9.0, 2.0, 1.0], [40.0, 60.0, 80.0, 100.0]])
+        mass = np.array([100.0, 50.0])
+        t_b, x_b, y_b, theta_b, v_b, omega_b, a_b = simulate_auv2_motion_batch(
+            T, np.pi / 3, 3.0, 2.0, mass=mass, t_final=2.0, theta0=0.5
+        )
+
+        # Stepping the prepared state by hand reproduces the batch simulator exactly
+        t, body, a_angular, mass, state = prepare_auv2_batch(
+            T, np.pi / 3, 3.0, 2.0, mass=mass, t_final=2.0, theta0=0.5
+        )
+        self.assertTrue(np.array_equal(t, t_b))
+        self.assertEqual(state.shape, (2, 6))
+        for i in range(1, len(t)):
+            a = step_auv2_batch(state, body, a_angular, mass, 0.1)
+            self.assertTrue(np.array_equal(a, a_b[:, i]))
+        self.assertTrue(
+            np.array_equal(
+                state,
+                np.column_stack(
+                    (x_b[:, -1], y_b[:, -1], theta_b[:, -1], v_b[:, -1], omega_b[:, -1])
+                ),
+            )
+        )
+
+        self.assertRaises(ValueError, prepare_auv2_batch, T, 0.5, 1.0, 1.0, mass=-1)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,66 @@
+import importlib.util
+import tempfile
+import unittest
+import numpy as np
+from physics import simulate_auv2_motion, simulate_auv2_motion_chunks
+from trajectory_store import save_trajectory
+from plotter import *
+
+
+class TestPlotter(unittest.TestCase):
+    def setUp(self):
+        self.T = np.array([40.0, 60.0, 80.0, 100.0])
+        self.trajectory = simulate_auv2_motion(self.T, np.pi / 3, 3.0, 2.0, dt=0.001)
+
+    def test_decimate_trajectory(self):
+        t, x, y, theta = self.trajectory[:4]
+        decimator = decimate_trajectory(self.trajectory, buckets=100)
+
+        # Every bucket keeps exactly the minimum and maximum of each channel
+        bucket = np.clip(((t - t[0]) * 100 / (t[-1] - t[0])).astype(int), 0, 99)
+        wrapped = np.mod(theta, 2 * np.pi)
+        for c, values in enumerate((x, y, wrapped)):
+            kept = decimator.extremes[c]
+            for b in range(100):
+                self.assertEqual(kept[b, 0, c + 1], values[bucket == b].min())
+                self.assertEqual(kept[b, 1, c + 1], values[bucket == b].max())
+        samples = decimator.samples("theta")
+        self.assertLessEqual(len(samples[0]), 200)
+        self.assertTrue(np.all(np.diff(samples[0]) >= 0))
+        self.assertEqual(samples[3].max(), wrapped.max())
+
+        # Memory-mapped stores and streamed chunks give the same samples
+        with tempfile.TemporaryDirectory() as directory:
+            store = save_trajectory(directory, self.trajectory)
+            stored = decimate_trajectory(store, buckets=100)
+            self.assertTrue(np.array_equal(stored.extremes, decimator.extremes))
+        chunks = simulate_auv2_motion_chunks(
+            self.T, np.pi / 3, 3.0, 2.0, dt=0.001, chunk_size=777
+        )
+        streamed = decimate_trajectory(chunks, buckets=100, t_range=(t[0], t[-1]))
+        self.assertTrue(np.allclose(streamed.extremes, decimator.extremes))
+
+        self.assertRaises(ValueError, decimate_trajectory, iter([]), 100)
+        self.assertRaises(ValueError, MinMaxDecimator, 0.0, 1.0, 0)
+
+    @unittest.skipIf(
+        importlib.util.find_spec("matplotlib") is None, "matplotlib is not installed"
+    )
+    def test_trajectory_plot(self):
+        import matplotlib
+
+        matplotlib.use("Agg")
+        plot = plot_auv2_motion(self.trajectory)
+        for name, line in plot.lines.items():
+            self.assertGreater(len(line.get_xdata()), 0)
+            self.assertLessEqual(len(line.get_xdata()), 6 * plot.buckets())
+
+        figure = plot.figure
+        short = simulate_auv2_motion(self.T, np.pi / 3, 3.0, 2.0, t_final=1.0)
+        self.assertIs(plot_auv2_motion(short, plot=plot), plot)
+        self.assertIs(plot.figure, figure)
+        self.assertLessEqual(plot.lines["x"].get_xdata().max(), 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
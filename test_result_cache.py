@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from physics import simulate_auv2_motion
+from result_cache import *
+
+
+def _simulate_in_process(path):
+    cache = ResultCache(path)
+    t, x, y, theta, v, omega, a = cache.simulate([40, 60, 80, 100], 0.5, 3, 2)
+    return float(x[-1])
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.T = np.array([40.0, 60.0, 80.0, 100.0])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_parameter_key(self):
+        key = parameter_key(self.T, np.pi / 3, 3.0, 2.0)
+        self.assertEqual(key, parameter_key([40, 60, 80, 100], np.pi / 3, 3, 2, 100))
+        self.assertNotEqual(key, parameter_key(self.T, np.pi / 3, 3.0, 2.0, dt=0.01))
+        self.assertNotEqual(key, parameter_key(self.T, np.pi / 3, 3.0, 2.0, theta0=1))
+        self.assertEqual(len(key), 64)
+
+    def test_simulate(self):
+        cache = ResultCache(self.directory.name)
+        expected = simulate_auv2_motion(self.T, np.pi / 3, 3.0, 2.0)
+
+        first = cache.simulate(self.T, np.pi / 3, 3.0, 2.0)
+        second = cache.simulate(self.T, np.pi / 3, 3.0, 2.0)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        for channel, a, b in zip(expected, first, second):
+            self.assertIsInstance(b, np.memmap)
+            self.assertTrue(np.array_equal(channel, a))
+            self.assertTrue(np.array_equal(channel, b))
+
+        # Other processes are served from the same entry
+        with ProcessPoolExecutor(2) as executor:
+            finals = list(executor.map(_simulate_in_process, [self.directory.name] * 4))
+        key = parameter_key(self.T, 0.5, 3, 2)
+        self.assertEqual(finals, [float(cache.get(key)[1][-1])] * 4)
+        self.assertEqual(len(cache.entries()), 2)
+        self.assertFalse(
+            any(name.startswith(".tmp-") for name in os.listdir(self.directory.name))
+        )
+
+    def test_evict(self):
+        cache = ResultCache(self.directory.name)
+        for mass in (50, 100, 150):
+            cache.simulate(self.T, np.pi / 3, 3.0, 2.0, mass=mass)
+        entry_size = max(size for _, size, _ in cache.entries())
+        oldest, middle, newest = [key for key, _, _ in cache.entries()]
+
+        # Using the oldest entry makes the middle one the least recently used
+        os.utime(os.path.join(self.directory.name, oldest, "header.json"), (1, 1))
+        os.utime(os.path.join(self.directory.name, middle, "header.json"), (0, 0))
+        cache.get(oldest)
+        cache.max_bytes = 2 * entry_size
+        cache.evict()
+        self.assertEqual(
+            sorted(key for key, _, _ in cache.entries()), sorted([oldest, newest])
+        )
+        self.assertIsNone(cache.get(middle))
+
+        held = cache.get(newest)
+        cache.clear()
+        self.assertEqual(cache.entries(), [])
+        self.assertEqual(len(held[0]), 100)
+
+        tiny = ResultCache(self.directory.name, max_bytes=0)
+        trajectory = tiny.simulate(self.T, np.pi / 3, 3.0, 2.0)
+        self.assertEqual(len(trajectory[0]), 100)
+        self.assertEqual(tiny.entries(), [])
+        self.assertRaises(ValueError, ResultCache, self.directory.name, -1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import unittest
+from unittest import mock
+import numpy as np
+from physics import simulate_auv2_motion
+from service import *
+
+
+class TestService(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.service = SimulationService(batch_delay=0.01)
+
+    async def asyncTearDown(self):
+        await self.service.close()
+
+    async def test_simulate(self):
+        T = [40.0, 60.0, 80.0, 100.0]
+        requests = [
+            self.service.simulate(T, np.pi / 3, 3.0, 2.0),
+            self.service.simulate(np.array(T), np.pi / 3, 3.0, 2.0, 100, 100),
+            self.service.simulate(T, np.pi / 4, 3.0, 2.0, mass=50, theta0=0.5),
+            self.service.simulate(T, np.pi / 3, 3.0, 2.0, t_final=2.0),
+        ]
+        results = await asyncio.gather(*requests)
+
+        # The two identical requests share one simulation, and the requests on the
+        # default time grid share one batched run
+        self.assertIs(results[0], results[1])
+        self.assertEqual(
+            self.service.stats,
+            {"requests": 4, "coalesced": 1, "batches": 2, "simulations": 3},
+        )
+        expected = [
+            simulate_auv2_motion(np.array(T), np.pi / 3, 3.0, 2.0),
+            simulate_auv2_motion(np.array(T), np.pi / 4, 3.0, 2.0, mass=50, theta0=0.5),
+            simulate_auv2_motion(np.array(T), np.pi / 3, 3.0, 2.0, t_final=2.0),
+        ]
+        for result, trajectory in zip(results[1:], expected):
+            for actual, channel in zip(result, trajectory):
+                self.assertTrue(np.allclose(actual, channel))
+        self.assertFalse(results[0][1].flags.writeable)
+
+        with self.assertRaises(ValueError):
+            await self.service.simulate(T, np.pi / 3, -3.0, 2.0)
+        with self.assertRaises(ValueError):
+            await self.service.simulate([1.0, 2.0], np.pi / 3, 3.0, 2.0)
+        with self.assertRaises(ValueError):
+            await self.service.simulate(T, np.pi / 3, 3.0, 2.0, dt=0)
+
+    async def test_max_batch(self):
+        service = SimulationService(max_batch=2, batch_delay=60)
+        try:
+            results = await asyncio.wait_for(
+                asyncio.gather(
+                    *(
+                        service.simulate([10.0, 20.0, 30.0, k], 0.5, 1.0, 1.0)
+                        for k in range(4)
+                    )
+                ),
+                timeout=10,
+            )
+        finally:
+            await service.close()
+        self.assertEqual(len(results), 4)
+        self.assertEqual(service.stats["batches"], 2)
+
+    async def test_http(self):
+        server = await self.service.start_server()
+        port = server.sockets[0].getsockname()[1]
+
+        async def send(request):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(request)
+            writer.write_eof()
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            head, _, body = response.partition(b"\r\n\r\n")
+            return head.split(b"\r\n")[0], json.loads(body)
+
+        async def post(path, body):
+            payload = json.dumps(body).encode()
+            return await send(
+                f"POST {path} HTTP/1.1\r\nContent-Length: {len(payload)}\r\n\r\n".encode()
+                + payload
+            )
+
+        async with server:
+            status, body = await post(
+                "/simulate",
+                {"T": [40.0, 60.0, 80.0, 100.0], "alpha": 0.5, "L": 3, "l": 2},
+            )
+            self.assertEqual(status, b"HTTP/1.1 200 OK")
+            t, x, y, theta, v, omega, a = simulate_auv2_motion(
+                np.array([40.0, 60.0, 80.0, 100.0]), 0.5, 3, 2
+            )
+            self.assertTrue(np.allclose(body["x"], x))
+            self.assertTrue(np.allclose(body["v"], v))
+
+            status, body = await post("/simulate", {"T": [1.0], "alpha": 0.5})
+            self.assertEqual(status, b"HTTP/1.1 400 Bad Request")
+            status, body = await post(
+                "/simulate",
+                {"T": [1.0, 2.0, 3.0, 4.0], "alpha": 0.5, "L": 3, "l": 2, "dt": 0},
+            )
+            self.assertEqual(status, b"HTTP/1.1 400 Bad Request")
+            status, body = await post("/other", {})
+            self.assertEqual(status, b"HTTP/1.1 404 Not Found")
+
+            # A failure of the simulation itself is a server error
+            with mock.patch(
+                "service.simulate_auv2_motion_batch", side_effect=MemoryError
+            ):
+                status, body = await post(
+                    "/simulate",
+                    {"T": [1.0, 2.0, 3.0, 4.0], "alpha": 0.5, "L": 3, "l": 2},
+                )
+            self.assertEqual(status, b"HTTP/1.1 500 Internal Server Error")
+            self.assertIn("Simulation failed", body["error"])
+
+            # Malformed requests are answered instead of failing the connection
+            for request in (
+                b"\r\n\r\n",
+                b"POST /simulate HTTP/1.1\r\nContent-Length: abc\r\n\r\n{}",
+                b"POST /simulate HTTP/1.1\r\nContent-Length: 100\r\n\r\n{}",
+            ):
+                status, body = await asyncio.wait_for(send(request), timeout=10)
+                self.assertEqual(status, b"HTTP/1.1 400 Bad Request")
+
+
+if __name__ == "__main__":
+    unittest.main()
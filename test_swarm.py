@@ -0,0 +1,87 @@
+import unittest
+import numpy as np
+from physics import simulate_auv2_motion_batch
+from swarm import *
+
+
+class TestSwarm(unittest.TestCase):
+    def test_find_close_pairs(self):
+        rng = np.random.default_rng(0)
+        x = rng.uniform(-20, 20, 500)
+        y = rng.uniform(-5, 30, 500)
+        # Points on cell boundaries and duplicates exercise the neighbour cells
+        x[:4] = [0.0, 1.5, 1.5, -1.5]
+        y[:4] = [0.0, 0.0, 0.0, 1.5]
+
+        i, j, distance = find_close_pairs(x, y, 1.5)
+        dx = x[:, None] - x[None, :]
+        dy = y[:, None] - y[None, :]
+        brute_i, brute_j = np.nonzero(np.triu(np.hypot(dx, dy) < 1.5, k=1))
+        self.assertTrue(np.array_equal(i, brute_i))
+        self.assertTrue(np.array_equal(j, brute_j))
+        self.assertTrue(np.allclose(distance, np.hypot(dx, dy)[i, j]))
+
+        self.assertEqual(len(find_close_pairs([1.0], [2.0], 1.0)[0]), 0)
+        self.assertEqual(len(find_close_pairs([0.0, 5.0], [0.0, 5.0], 1.0)[0]), 0)
+        self.assertRaises(ValueError, find_close_pairs, x, y, 0)
+
+    def test_simulate_swarm(self):
+        n = 6
+        rng = np.random.default_rng(1)
+        T = rng.uniform(0, 100, (n, 4))
+        alpha = rng.uniform(0.2, 1.2, n)
+        x0 = 50.0 * np.arange(n)
+        t, x, y, theta, violations = simulate_swarm(
+            T, alpha, 3.0, 2.0, mass=np.linspace(50, 150, n), x0=x0
+        )
+        expected = simulate_auv2_motion_batch(
+            T, alpha, 3.0, 2.0, mass=np.linspace(50, 150, n), x0=x0
+        )
+        # Both simulators take the same steps, so the trajectories agree exactly
+        self.assertTrue(np.array_equal(t, expected[0]))
+        for actual, channel in zip((x, y, theta), expected[1:4]):
+            self.assertEqual(actual.shape, (n, len(t)))
+            self.assertTrue(np.array_equal(actual, channel))
+        self.assertEqual(len(violations), 0)
+
+    def test_violations(self):
+        # Two AUVs driving straight at each other, and a third far away
+        T = np.array([[10.0, 10.0, 0.0, 0.0], [0.0, 0.0, 10.0, 10.0], [1.0] * 4])
+        x0 = np.array([-10.0, 10.0, 0.0])
+        y0 = np.array([0.0, 0.0, 100.0])
+        t, x, y, theta, violations = simulate_swarm(
+            T, 0.0, 3.0, 2.0, t_final=20, x0=x0, y0=y0, separation=2.0
+        )
+        gap = np.abs(x[1] - x[0])
+        onset = np.argmax(gap < 2.0)
+        # The pair closes in, passes through each other and separates, then is
+        # reported once only
+        self.assertEqual(violations.dtype, VIOLATION_DTYPE)
+        self.assertEqual(len(violations), 1)
+        self.assertEqual(violations["step"][0], onset)
+        self.assertEqual(violations["time"][0], t[onset])
+        self.assertEqual((violations["i"][0], violations["j"][0]), (0, 1))
+        self.assertAlmostEqual(violations["distance"][0], gap[onset])
+
+        t, x, y, theta, first = simulate_swarm(
+            T,
+            0.0,
+            3.0,
+            2.0,
+            t_final=20,
+            x0=x0,
+            y0=y0,
+            separation=2.0,
+            stop_on_violation=True,
+        )
+        self.assertEqual(len(t), onset + 1)
+        self.assertEqual(x.shape, (3, onset + 1))
+        self.assertTrue(np.array_equal(first, violations))
+
+        self.assertRaises(ValueError, simulate_swarm, T[:, :3], 0.0, 3.0, 2.0)
+        self.assertRaises(ValueError, simulate_swarm, T, 0.0, 3.0, 2.0, separation=0)
+        self.assertRaises(TypeError, simulate_swarm, T.tolist(), 0.0, 3.0, 2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from physics import simulate_auv2_motion
+from sweep import *
+
+
+class TestSweep(unittest.TestCase):
+    def test_build_parameter_grid(self):
+        grid = build_parameter_grid(
+            [[40.0, 60.0, 80.0, 100.0], [1.0, 9.0, 2.0, 1.0]],
+            [np.pi / 6, np.pi / 3],
+            [3.0],
+            [2.0, 0.5],
+            [100.0, 50.0],
+        )
+
+        self.assertEqual(grid["T"].shape, (16, 4))
+        self.assertEqual(grid["alpha"].shape, (16,))
+        self.assertTrue(np.all(grid["inertia"] == 100.0))
+        self.assertEqual(len({tuple(row) for row in grid["T"]}), 2)
+
+        self.assertRaises(
+            ValueError, build_parameter_grid, [[1.0, 2.0]], [0.5], [1], [1]
+        )
+
+    def test_run_sweep(self):
+        grid = build_parameter_grid(
+            [[40.0, 60.0, 80.0, 100.0], [1.0, 9.0, 2.0, 1.0]],
+            [np.pi / 6, np.pi / 3],
+            [3.0, 1.0],
+            [2.0],
+            [100.0, 50.0],
+        )
+
+        serial = run_sweep(grid, 0.1, 5.0, workers=0, chunk_size=3)
+        parallel = run_sweep(grid, 0.1, 5.0, workers=2, chunk_size=5)
+        self.assertEqual(serial.shape, (16, len(SUMMARY_METRICS)))
+        self.assertTrue(np.array_equal(serial, parallel))
+
+        for i in (0, 7, 15):
+            t, x, y, theta, v, omega, a = simulate_auv2_motion(
+                grid["T"][i],
+                grid["alpha"][i],
+                grid["L"][i],
+                grid["l"][i],
+                grid["inertia"][i],
+                grid["mass"][i],
+                0.1,
+                5.0,
+            )
+            self.assertTrue(
+                np.allclose(serial[i, :3], [x[-1], y[-1], theta[-1]], rtol=1e-9)
+            )
+
+        self.assertRaises(ValueError, run_sweep, grid, chunk_size=0)
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "summary.csv")
+            main(
+                [
+                    "--T",
+                    "40,60,80,100",
+                    "--alpha",
+                    "0.5",
+                    "1.0",
+                    "--L",
+                    "3",
+                    "--l",
+                    "2",
+                    "--t-final",
+                    "1",
+                    "--workers",
+                    "0",
+                    "--output",
+                    path,
+                ]
+            )
+            with open(path) as file:
+                lines = file.read().splitlines()
+            self.assertEqual(len(lines), 3)
+            self.assertTrue(lines[0].startswith("T1,T2,T3,T4,alpha"))
+
+
+if __name__ == "__main__":
+    unittest.main()
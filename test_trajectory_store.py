@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from physics import simulate_auv2_motion, simulate_auv2_motion_chunks
+from trajectory_store import *
+
+
+class TestTrajectoryStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.parameters = {
+            "T": np.array([40.0, 60.0, 80.0, 100.0]),
+            "alpha": np.pi / 3,
+            "L": 3.0,
+            "l": 2.0,
+        }
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_save_trajectory(self):
+        trajectory = simulate_auv2_motion(**self.parameters)
+        store = save_trajectory(self.directory.name, trajectory, self.parameters)
+
+        reopened = TrajectoryStore(self.directory.name)
+        self.assertEqual(len(reopened), len(trajectory[0]))
+        self.assertEqual(reopened.parameters["T"], [40.0, 60.0, 80.0, 100.0])
+        for expected, actual in zip(trajectory, reopened.read()):
+            self.assertIsInstance(actual, np.memmap)
+            self.assertTrue(np.array_equal(expected, actual))
+
+        self.assertRaises(FileExistsError, TrajectoryStore.create, self.directory.name)
+        self.assertRaises(KeyError, store.channel, "z")
+
+    def test_append(self):
+        store = TrajectoryStore.create(self.directory.name, self.parameters)
+        self.assertEqual(store.channel("v").shape, (0, 2))
+
+        chunks = simulate_auv2_motion_chunks(
+            **self.parameters, dt=0.01, t_final=50.0, chunk_size=999
+        )
+        for chunk in chunks:
+            store.append(*chunk)
+
+        expected = simulate_auv2_motion(
+            **self.parameters, dt=0.01, t_final=50.0, vectorized=True
+        )
+        for name, channel in zip(CHANNELS, expected):
+            self.assertTrue(np.array_equal(channel, store.channel(name)))
+            # Each channel file stays a plain .npy file
+            self.assertTrue(
+                np.array_equal(channel, np.load(f"{self.directory.name}/{name}.npy"))
+            )
+
+        self.assertRaises(ValueError, store.append, *(np.zeros(3) for _ in range(7)))
+
+    def test_append_header_is_atomic(self):
+        store = TrajectoryStore.create(self.directory.name, self.parameters)
+        trajectory = simulate_auv2_motion(**self.parameters, t_final=1.0)
+        replace = os.replace
+        seen = []
+
+        def check_then_replace(source, destination):
+            # Right before the new header lands, readers still see the old one whole
+            seen.append(len(TrajectoryStore(self.directory.name)))
+            replace(source, destination)
+
+        with mock.patch("trajectory_store.os.replace", check_then_replace):
+            store.append(*trajectory)
+            store.append(*trajectory)
+        self.assertEqual(seen, [0, 10])
+        self.assertEqual(len(TrajectoryStore(self.directory.name)), 20)
+        self.assertEqual(
+            sorted(os.listdir(self.directory.name)),
+            sorted([HEADER_FILE] + [f"{name}.npy" for name in CHANNELS]),
+        )
+
+    def test_failed_append(self):
+        store = TrajectoryStore.create(self.directory.name, self.parameters)
+        first = simulate_auv2_motion(**self.parameters, t_final=1.0)
+        store.append(*first)
+
+        # The append fails after writing some of the channel files
+        writes = 0
+        original = np.ascontiguousarray
+
+        def failing(*args, **kwargs):
+            nonlocal writes
+            writes += 1
+            if writes == 3:
+                raise OSError("Disk full")
+            return original(*args, **kwargs)
+
+        with mock.patch("trajectory_store.np.ascontiguousarray", failing):
+            self.assertRaises(OSError, store.append, *first)
+        self.assertEqual(len(store), 10)
+        self.assertEqual(len(TrajectoryStore(self.directory.name)), 10)
+
+        # The next append replaces the rows left by the failed one in every channel
+        second = simulate_auv2_motion(**self.parameters, t_final=1.0, x0=100.0)
+        store.append(*second)
+        expected = [np.concatenate(pair) for pair in zip(first, second)]
+        for name, channel in zip(CHANNELS, expected):
+            self.assertTrue(np.array_equal(store.channel(name), channel))
+            self.assertTrue(
+                np.array_equal(np.load(f"{self.directory.name}/{name}.npy"), channel)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import json
+import os
+
+import numpy as np
+
+# Channels of a simulate_auv2_motion trajectory, with the trailing shape of each sample
+CHANNELS = {
+    "t": (),
+    "x": (),
+    "y": (),
+    "theta": (),
+    "v": (2,),
+    "omega": (),
+    "a": (2,),
+}
+HEADER_FILE = "header.json"
+
+# Every channel file is a version 1.0 .npy file with a header padded to this many bytes,
+# so the shape can be rewritten in place as samples are appended
+_NPY_HEADER_SIZE = 128
+
+
+def _write_npy_header(file, shape):
+    header = repr(
+        {"descr": np.dtype(float).str, "fortran_order": False, "shape": shape}
+    )
+    preamble = b"\x93NUMPY\x01\x00"
+    header_length = _NPY_HEADER_SIZE - len(preamble) - 2
+    header = header.ljust(header_length - 1).encode("latin1") + b"\n"
+    if len(header) != header_length:
+        raise ValueError("The channel shape does not fit in the .npy header")
+    file.seek(0)
+    file.write(preamble + header_length.to_bytes(2, "little") + header)
+
+
+def _to_json(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot store a {type(value).__name__} run parameter")
+
+
+def _write_header(path, parameters, length):
+    # Written to a temporary file and renamed over the old header, so readers see
+    # either the previous header or the new one, never a partly written file
+    temporary = os.path.join(path, f"{HEADER_FILE}.{os.getpid()}.tmp")
+    with open(temporary, "w") as file:
+        json.dump({"parameters": parameters, "length": length}, file, default=_to_json)
+    os.replace(temporary, os.path.join(path, HEADER_FILE))
+
+
+class TrajectoryStore:
+    """
+    Columnar on-disk store for an AUV2 trajectory: each of the t, x, y, theta, v, omega and a channels lives in its own .npy file next to a small JSON header holding the run parameters, so trajectories can be appended chunk by chunk and read back as memory maps without loading them into RAM
+
+    path: directory of an existing store
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, HEADER_FILE)) as file:
+            header = json.load(file)
+        self.parameters = header["parameters"]
+        self.length = header["length"]
+
+    @classmethod
+    def create(cls, path: str, parameters: dict = None):
+        """
+        Creates an empty store in the directory path, recording the run parameters in its header
+
+        path: directory to create the store in; it must not already hold a store
+        parameters(optional): dict of the run parameters, e.g. the arguments given to simulate_auv2_motion
+        """
+
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(os.path.join(path, HEADER_FILE)):
+            raise FileExistsError(f"A trajectory store already exists at {path}")
+        for channel, shape in CHANNELS.items():
+            with open(os.path.join(path, f"{channel}.npy"), "wb") as file:
+                _write_npy_header(file, (0, *shape))
+        _write_header(path, parameters or {}, 0)
+        return cls(path)
+
+    def __len__(self):
+        return self.length
+
+    def append(self, t, x, y, theta, v, omega, a):
+        """
+        Appends samples of every channel to the end of the store, e.g. one chunk from simulate_auv2_motion_chunks
+        """
+
+        samples = dict(zip(CHANNELS, (t, x, y, theta, v, omega, a)))
+        count = len(t)
+        for channel, shape in CHANNELS.items():
+            data = np.asarray(samples[channel], dtype=float)
+            if data.shape != (count, *shape):
+                raise ValueError(
+                    f"The {channel} channel must have shape {(count, *shape)}"
+                )
+
+        length = self.length + count
+        for channel, shape in CHANNELS.items():
+            row_bytes = np.dtype(float).itemsize * int(np.prod(shape))
+            with open(os.path.join(self.path, f"{channel}.npy"), "r+b") as file:
+                # Samples go right after the committed rows rather than at the end of the
+                # file, overwriting and truncating any rows left by a failed append
+                file.seek(_NPY_HEADER_SIZE + self.length * row_bytes)
+                file.write(
+                    np.ascontiguousarray(samples[channel], dtype=float).tobytes()
+                )
+                file.truncate()
+                _write_npy_header(file, (length, *shape))
+
+        # The header is rewritten last, so readers never see more samples than were written
+        _write_header(self.path, self.parameters, length)
+        self.length = length
+
+    def channel(self, name: str) -> np.ndarray:
+        """
+        Returns a read-only memory map of one channel
+        """
+
+        if name not in CHANNELS:
+            raise KeyError(f"Unknown channel {name}, expected one of {tuple(CHANNELS)}")
+        if self.length == 0:
+            return np.empty((0, *CHANNELS[name]))
+        data = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+        return data[: self.length]
+
+    def read(self):
+        """
+        Returns read-only memory maps of (t, x, y, theta, v, omega, a), in the same order as simulate_auv2_motion
+        """
+
+        return tuple(self.channel(name) for name in CHANNELS)
+
+
+def save_trajectory(path, trajectory, parameters=None):
+    """
+    Writes a trajectory returned by simulate_auv2_motion, or an iterable of chunks from simulate_auv2_motion_chunks, to a new store and returns it
+
+    path: directory to create the store in
+    trajectory: (t, x, y, theta, v, omega, a) tuple, or an iterable of such tuples
+    parameters(optional): dict of the run parameters to record in the header
+    """
+
+    store = TrajectoryStore.create(path, parameters)
+    chunks = [trajectory] if isinstance(trajectory, tuple) else trajectory
+    for chunk in chunks:
+        store.append(*chunk)
+    return store